@@ -0,0 +1,55 @@
+import os
+
+from flask import Flask
+
+_database_registered = False
+
+
+def connect_database(db='rare_diseases', **settings):
+    """Register the default Mongo connection, once.
+
+    Registering parses MONGO_URI, which for a mongodb+srv:// URI is a blocking
+    DNS lookup, so it runs before the first request instead of at import or
+    in create_app(). The socket itself is opened by the first query. Scripts
+    and benchmarks call this first to point the app at another server.
+    """
+    global _database_registered
+    if _database_registered:
+        return
+    from mongoengine import register_connection
+
+    settings.setdefault('host', os.getenv('MONGO_URI'))
+    register_connection('default', db=db, **settings)
+    _database_registered = True
+
+
+def create_app():
+    """Build the Flask app without doing any network or data work.
+
+    The catalogue snapshot and change watcher are likewise set up by the
+    first request that needs them.
+    """
+    if 'MONGO_URI' not in os.environ:
+        # Render injects MONGO_URI itself; .env is only for local runs
+        from dotenv import load_dotenv
+        load_dotenv()
+
+    from flask_cors import CORS
+
+    from app.admission import AdmissionController
+    from app.api import bp
+    from app.importer import backfill_command, import_command
+    from app.profiling import Profiler
+    from app.related import rebuild_related_command
+
+    app = Flask(__name__)
+    CORS(app)
+    AdmissionController().init_app(app)
+    # After admission control, so rejected requests are never profiled
+    Profiler().init_app(app)
+    app.before_request(connect_database)
+    app.register_blueprint(bp)
+    app.cli.add_command(import_command)
+    app.cli.add_command(backfill_command)
+    app.cli.add_command(rebuild_related_command)
+    return app
@@ -0,0 +1,148 @@
+"""In-process admission control: per-client rate limits and load shedding.
+
+Each client (a known API key, else the address the trusted proxy appended
+to X-Forwarded-For, else the peer address) gets a token bucket; a request
+without a token is answered 429 at once. Admitted requests then need a
+slot: a worker runs at most ADMISSION_SLOTS requests at a time, and one
+route may hold at most ROUTE_SHARE of them, so a slow route cannot starve
+the others. Without a free slot the request is shed with 503 at once.
+Both carry Retry-After, so under overload clients back off instead of
+timing out and the requests that are accepted keep a bounded latency.
+
+Nothing waits in here: under gthread, requests beyond the worker's threads
+queue in gunicorn before this code runs, where they cannot be shed. The
+slots therefore default to one less than the threads, keeping a thread
+free to turn away what the slots do not admit.
+
+Limits are per worker process and come from the environment:
+
+    RATE_LIMIT_PER_SECOND   tokens added per client per second (default 10)
+    RATE_LIMIT_BURST        bucket size (default 20)
+    API_KEYS                comma-separated X-API-Key values that get their own bucket
+    ADMISSION_SLOTS         requests in flight per worker (default GUNICORN_THREADS - 1)
+    ROUTE_SHARE             fraction of the slots one route may hold, rounded up
+                            (default 0.5)
+"""
+from collections import OrderedDict
+import math
+import os
+import threading
+import time
+
+from flask import g, jsonify, request
+
+# Buckets kept for distinct clients; the least recently seen are dropped first
+MAX_CLIENTS = 10000
+# Anyone can send any header, so only issued keys may pick their own bucket
+API_KEYS = frozenset(key.strip() for key in os.getenv('API_KEYS', '').split(',') if key.strip())
+
+
+def default_slots():
+    return max(1, int(os.getenv('GUNICORN_THREADS', '4')) - 1)
+
+
+class TokenBucket:
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, burst):
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+
+class RateLimiter:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key):
+        """Take a token for ``key``; returns 0, or the seconds until one is available."""
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.pop(key, None) or TokenBucket(self.burst)
+            self.buckets[key] = bucket
+            if len(self.buckets) > MAX_CLIENTS:
+                self.buckets.popitem(last=False)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+            bucket.updated_at = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0
+            return (1 - bucket.tokens) / self.rate
+
+
+class Slots:
+    """Requests in flight, at most ``total`` in all and ``per_route`` for any one route."""
+
+    def __init__(self, total, per_route):
+        self.total = total
+        self.per_route = per_route
+        self.in_flight = 0
+        self.routes = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, route):
+        with self.lock:
+            held = self.routes.get(route, 0)
+            if self.in_flight >= self.total or held >= self.per_route:
+                return False
+            self.in_flight += 1
+            self.routes[route] = held + 1
+            return True
+
+    def release(self, route):
+        with self.lock:
+            self.in_flight -= 1
+            held = self.routes.pop(route) - 1
+            if held:
+                self.routes[route] = held
+
+
+class AdmissionController:
+    def __init__(self, rate=None, burst=None, slots=None, share=None):
+        self.rate_limiter = RateLimiter(
+            rate if rate is not None else float(os.getenv('RATE_LIMIT_PER_SECOND', '10')),
+            burst if burst is not None else float(os.getenv('RATE_LIMIT_BURST', '20')),
+        )
+        slots = slots if slots is not None else int(os.getenv('ADMISSION_SLOTS', default_slots()))
+        share = share if share is not None else float(os.getenv('ROUTE_SHARE', '0.5'))
+        self.slots = Slots(slots, max(1, math.ceil(slots * share)))
+
+    def init_app(self, app):
+        app.before_request(self.before_request)
+        app.teardown_request(self.teardown_request)
+
+    @staticmethod
+    def client_key():
+        api_key = request.headers.get('X-API-Key')
+        if api_key in API_KEYS:
+            return 'key:' + api_key
+        # Earlier hops are whatever the client sent; the last is the one our proxy added
+        forwarded = request.headers.get('X-Forwarded-For')
+        return 'ip:' + (forwarded.split(',')[-1].strip() if forwarded else (request.remote_addr or ''))
+
+    def before_request(self):
+        if request.method == 'OPTIONS' or not request.path.startswith('/api/') or request.endpoint is None:
+            return None
+
+        wait = self.rate_limiter.take(self.client_key())
+        if wait:
+            return self.reject(429, "Rate limit exceeded", wait)
+
+        if not self.slots.acquire(request.endpoint):
+            return self.reject(503, "Server busy, try again shortly", 1)
+        g.admission_route = request.endpoint
+        return None
+
+    def teardown_request(self, exc=None):
+        route = g.pop('admission_route', None)
+        if route is not None:
+            self.slots.release(route)
+
+    @staticmethod
+    def reject(status, message, retry_after):
+        response = jsonify({"error": message})
+        response.status_code = status
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
@@ -1,1118 +1,656 @@
-from flask import Flask, jsonify, request
-from dotenv import load_dotenv
-from mongoengine import *
-from flask_cors import CORS
+from flask import Blueprint, Response, g, has_request_context, jsonify, request, stream_with_context
+from app import export
+from app.breaker import GuardedQueries, PoolFull, QueryUnavailable
+from mongoengine.connection import get_db
+from app.catalogue import Catalogue
+from app.folding import name_score, query_tokens
+from app.importer import editable_fields, import_records, normalize_record
+from app.models import (
+    DiseaseCard, ProfessionalCenter, RelatedDiseases, Tombstone, prepare_collections, safe_revision, tombstone_horizon,
+)
+from app.related import rebuild_related
+from app.singleflight import SingleFlight
+from app.snapshot import Snapshot, encode_record, refresh_lock, snapshot_stat, write_snapshot
+from app.watcher import ChangeWatcher
+from app.writes import WriteBehind, WriteOp
+from bson import ObjectId, Timestamp
+from concurrent.futures import wait
+from pymongo.errors import PyMongoError
+import datetime
+import hmac
+import json
+import logging
+import math
 import os
+import tempfile
+import threading
+import time
 
-load_dotenv()
+bp = Blueprint('api', __name__)
+log = logging.getLogger(__name__)
 
-app = Flask(__name__)
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 
-CORS(app)
+# Seconds a published catalogue snapshot is served before it is reloaded from Mongo
+CATALOGUE_TTL = float(os.getenv('CATALOGUE_TTL', '60'))
+CATALOGUE_SNAPSHOT = os.getenv(
+    'CATALOGUE_SNAPSHOT',
+    os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'rare_catalogue.snapshot'),
+)
 
-try:
-    connect('rare_diseases', host=os.getenv('MONGO_URI'))
-    print("MongoDB connection successful!")
-except Exception as e:
-    print("MongoDB connection failed:", e)
+# Change-stream patching of the per-worker catalogue (needs a replica set)
+CATALOGUE_CHANGE_STREAMS = os.getenv('CATALOGUE_CHANGE_STREAMS', '1') == '1'
+# Patches a worker may hold on top of its snapshot before it publishes a fresh one
+CATALOGUE_MAX_PATCHES = int(os.getenv('CATALOGUE_MAX_PATCHES', '10000'))
 
+_snapshot = None
+_catalogue = None
+_catalogue_lock = threading.RLock()
+_watcher = None
+# (cluster time, kind, id, document or None, its encoded JSON) for every change seen by the watcher
+# that may not be in the current snapshot yet
+_pending_changes = []
+# Held while this worker's background snapshot refresh is queued or running
+_refreshing = threading.Lock()
+# Identical concurrent searches share one Mongo query and one encoded result
+_searches = SingleFlight()
+# Searches run behind a circuit breaker and deadline, falling back to their last good result
+_queries = GuardedQueries(_searches)
+# Server-side limit for a guarded query, which may outlive the request that started it
+QUERY_MAX_TIME_MS = int(os.getenv('QUERY_MAX_TIME_MS', '5000'))
 
-class DiseaseCard(Document):
-    name = StringField(required=True)
-    symptoms = ListField(StringField())
-    causes = ListField(StringField())
-    treatments = ListField(StringField())
-    prevalance = StringField()
-    resourses = ListField(URLField())
+# /api/search: seconds both collections get before the answer goes out with what has arrived
+SEARCH_DEADLINE = float(os.getenv('SEARCH_DEADLINE', '1.0'))
+SEARCH_LIMIT = 100
 
-class ProfessionalCenter(Document):
-    name = StringField(required=True)
-    location = StringField(required=True)
-    google_maps_embed = URLField(required=True)
-    diseases = ListField(StringField())
-    contact_info = DictField()  # {'phone': '...', 'email': '...', 'website': '...'}
-    hours_of_operation = StringField()  # Simple for now ("24/7", "9am-5pm Mon-Fri", etc.)
+# Bearer token for POST/PATCH/DELETE; the write API is off while it is unset
+WRITE_API_TOKEN = os.getenv('WRITE_API_TOKEN', '')
+WRITE_MODELS = {'diseases': DiseaseCard, 'professional_centers': ProfessionalCenter}
+_writer = None
+_writer_lock = threading.Lock()
 
 
+# Derived at write time for matching and diffing; of no use to clients
+INTERNAL_FIELDS = ('search_prefixes', 'name_key', 'content_hash', 'opening_intervals')
 
-@app.route('/api/diseases', methods=['GET'])
+
+def public_document(doc):
+    doc['id'] = str(doc.pop('_id'))  # Convert _id to string and rename to id
+    for field in INTERNAL_FIELDS:
+        doc.pop(field, None)
+    if isinstance(doc.get('updated_at'), datetime.datetime):
+        doc['updated_at'] = doc['updated_at'].isoformat() + 'Z'
+    return doc
+
+
+def _write_catalogue():
+    # Cluster time before reading, so watchers can replay anything after it
+    operation_time = get_db().command('ping').get('operationTime')
+    # Not served, but the catalogue's opening index reads them back from meta
+    opening_intervals = {}
+    centers = []
+    for doc in ProfessionalCenter._get_collection().find():
+        opening_intervals[str(doc['_id'])] = doc.get('opening_intervals')
+        centers.append(public_document(doc))
+    write_snapshot(
+        CATALOGUE_SNAPSHOT,
+        (public_document(doc) for doc in DiseaseCard._get_collection().find()),
+        centers,
+        meta={
+            'operation_time': [operation_time.time, operation_time.inc] if operation_time else None,
+            'opening_intervals': opening_intervals,
+        },
+    )
+    return operation_time
+
+
+def publish_catalogue():
+    """Load both collections from Mongo and atomically swap in a new snapshot."""
+    # Also what builds the indexes, in gunicorn's master before any worker starts
+    prepare_collections()
+    with refresh_lock(CATALOGUE_SNAPSHOT):
+        _write_catalogue()
+
+
+def refresh_snapshot(mtime):
+    """Rewrite an expired snapshot, unless another worker already has.
+
+    Runs as the breaker's probe when the circuit is half open, so every
+    path reports back to it.
+    """
+    with refresh_lock(CATALOGUE_SNAPSHOT, blocking=False) as locked:
+        if not locked or snapshot_stat(CATALOGUE_SNAPSHOT).st_mtime != mtime:
+            # Nothing was asked of Mongo; let the next query probe instead
+            _queries.breaker.release()
+            return
+        try:
+            _write_catalogue()
+        except PyMongoError as e:
+            _queries.breaker.failure()
+            log.warning("Catalogue snapshot refresh failed: %s", e)
+        except Exception:
+            _queries.breaker.release()
+            log.exception("Catalogue snapshot refresh failed")
+        else:
+            _queries.breaker.success()
+
+
+def background_refresh(mtime):
+    try:
+        refresh_snapshot(mtime)
+    finally:
+        _refreshing.release()
+
+
+def get_snapshot():
+    global _snapshot
+    st = snapshot_stat(CATALOGUE_SNAPSHOT)
+    if st is None:
+        publish_catalogue()
+        st = snapshot_stat(CATALOGUE_SNAPSHOT)
+    elif time.time() - st.st_mtime > CATALOGUE_TTL and not (_watcher and _watcher.connected.is_set()):
+        # Keep serving the expired snapshot while one background refresh replaces it
+        if _refreshing.acquire(blocking=False):
+            if not _queries.breaker.allow():
+                _refreshing.release()
+            else:
+                try:
+                    _queries.pool.submit(background_refresh, st.st_mtime)
+                except PoolFull:
+                    _queries.breaker.release()
+                    _refreshing.release()
+        mark_stale(time.time() - st.st_mtime)
+    if _snapshot is None or _snapshot.key != (st.st_ino, st.st_mtime_ns):
+        _snapshot = Snapshot(CATALOGUE_SNAPSHOT)
+    return _snapshot
+
+
+def mark_stale(age):
+    """Flag the current response as served from data ``age`` seconds old."""
+    if has_request_context():
+        g.stale_age = max(age, g.get('stale_age', 0))
+
+
+@bp.after_request
+def add_staleness_headers(response):
+    age = g.pop('stale_age', None)
+    if age is not None:
+        response.headers['Warning'] = '110 - "Response is Stale"'
+        response.headers['Age'] = str(int(age))
+    return response
+
+
+@bp.errorhandler(QueryUnavailable)
+def query_unavailable(e):
+    response = jsonify({"error": "Database unavailable, try again shortly"})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(max(1, math.ceil(e.retry_after)))
+    return response
+
+
+def guarded(key, fn):
+    result, age = _queries.query(key, fn)
+    if age is not None:
+        mark_stale(age)
+    return result
+
+
+def snapshot_operation_time(snapshot):
+    operation_time = snapshot.meta.get('operation_time')
+    return Timestamp(*operation_time) if operation_time else None
+
+
+def get_catalogue():
+    global _catalogue, _pending_changes
+    snapshot = get_snapshot()
+    with _catalogue_lock:
+        if _catalogue is None or _catalogue.snapshot is not snapshot:
+            catalogue = Catalogue.from_snapshot(snapshot)
+            # Replay changes the new snapshot was read too early to contain
+            operation_time = snapshot_operation_time(snapshot)
+            _pending_changes = [
+                change for change in _pending_changes
+                if operation_time is not None and change[0] > operation_time
+            ]
+            for _, kind, record_id, doc, encoded in _pending_changes:
+                catalogue.apply(kind, record_id, doc, encoded)
+            _catalogue = catalogue
+        if CATALOGUE_CHANGE_STREAMS and _watcher is None:
+            start_watcher(snapshot_operation_time(snapshot))
+        return _catalogue
+
+
+def start_watcher(start_at):
+    global _watcher
+    _watcher = ChangeWatcher(
+        get_db,
+        [DiseaseCard._get_collection_name(), ProfessionalCenter._get_collection_name()],
+        apply_change,
+        start_at=start_at,
+    )
+    _watcher.start()
+
+
+def apply_change(change):
+    """Patch or evict the records a change stream event touches."""
+    global _catalogue
+    operation = change['operationType']
+    if operation not in ('insert', 'update', 'replace', 'delete'):
+        # drop, rename, invalidate, lost history: nothing surgical to do
+        with _catalogue_lock:
+            _pending_changes.clear()
+            _catalogue = None
+        publish_catalogue()
+        return
+
+    kind = 'diseases' if change['ns']['coll'] == DiseaseCard._get_collection_name() else 'centers'
+    record_id = str(change['documentKey']['_id'])
+    doc = change.get('fullDocument') if operation != 'delete' else None
+    patch_catalogue(change['clusterTime'], kind, {record_id: doc})
+
+
+def patch_catalogue(cluster_time, kind, docs):
+    """Apply ``{record_id: raw document or None}`` to this worker's catalogue.
+
+    ``cluster_time`` (None on servers without one) is when the changes were
+    known to be committed; a snapshot read before it gets them replayed.
+    """
+    with _catalogue_lock:
+        for record_id, doc in docs.items():
+            encoded = None
+            if doc is not None:
+                intervals = doc.get('opening_intervals')
+                doc = public_document(dict(doc))
+                encoded = encode_record(doc)
+                if intervals is not None:
+                    # For the opening index only; ``encoded`` is what gets served
+                    doc['opening_intervals'] = intervals
+            if cluster_time is not None:
+                _pending_changes.append((cluster_time, kind, record_id, doc, encoded))
+            if _catalogue is not None:
+                _catalogue.apply(kind, record_id, doc, encoded)
+        compact = len(_pending_changes) > CATALOGUE_MAX_PATCHES
+    if compact:
+        with refresh_lock(CATALOGUE_SNAPSHOT, blocking=False) as locked:
+            if not locked:
+                return
+            operation_time = _write_catalogue()
+        if operation_time is not None:
+            # The new snapshot holds everything up to operation_time; stop keeping it for replay
+            with _catalogue_lock:
+                _pending_changes[:] = [change for change in _pending_changes if change[0] > operation_time]
+
+
+def apply_writes(kind, docs):
+    """Catalogue update for records the write API has just committed."""
+    operation_time = get_db().command('ping').get('operationTime')
+    patch_catalogue(operation_time, 'diseases' if kind == 'diseases' else 'centers', docs)
+
+
+# Query parameter -> DiseaseCard facet field, e.g. ?prevalance=Rare&cause=Genetic+mutation
+DISEASE_FILTERS = {
+    'prevalance': 'prevalance',
+    'cause': 'causes',
+    'symptom': 'symptoms',
+    'treatment': 'treatments',
+}
+
+
+def disease_filters():
+    filters = {}
+    for param, field in DISEASE_FILTERS.items():
+        values = request.args.getlist(param)
+        if values:
+            filters[field] = values
+    return filters
+
+
+def json_response(body):
+    return Response(body, mimetype='application/json')
+
+
+def encoded_matches(documents):
+    """``(id, name, encoded JSON)`` for each matched document."""
+    return [
+        (doc['id'], doc['name'], encode_record(doc))
+        for doc in (public_document(document.to_mongo().to_dict()) for document in documents)
+    ]
+
+
+def search_diseases(tokens, filters=None, limit=None):
+    cards = DiseaseCard.objects(search_prefixes__all=tokens, **{
+        field + '__in': values for field, values in (filters or {}).items()
+    }).max_time_ms(QUERY_MAX_TIME_MS)
+    return encoded_matches(cards.limit(limit) if limit else cards)
+
+
+def disease_search_key(tokens, filters=None):
+    return ('diseases', tuple(tokens), tuple(sorted((field, tuple(sorted(values))) for field, values in (filters or {}).items())))
+
+
+@bp.route('/api/diseases', methods=['GET'])
 def get_diseases():
-    query = request.args.get('q', '').lower()
-    if query:
-        cards = DiseaseCard.objects(name__icontains=query)
-    else:
-        cards = DiseaseCard.objects()
-    # Convert ObjectId to string for JSON serialization
-    result = []
-    for card in cards:
-        card_dict = card.to_mongo().to_dict()
-        card_dict['id'] = str(card_dict.pop('_id'))  # Convert _id to string and rename to id
-        result.append(card_dict)
-    return jsonify(result)
-
-
-@app.route('/api/professional_centers', methods=['GET'])
+    query = request.args.get('q', '')
+    filters = disease_filters()
+    if not query:
+        if not filters:
+            return json_response(get_catalogue().json_array('diseases'))
+        catalogue = get_catalogue()
+        return json_response(catalogue.json_array('diseases', catalogue.select_diseases(filters)))
+    tokens = query_tokens(query)
+    if not tokens:
+        return json_response(b'[]')
+    cards = guarded(disease_search_key(tokens, filters), lambda: search_diseases(tokens, filters))
+    return json_response(b'[' + b','.join(encoded for _, _, encoded in cards) + b']')
+
+
+@bp.route('/api/diseases/facets', methods=['GET'])
+def get_disease_facets():
+    catalogue = get_catalogue()
+    bits = catalogue.select_diseases(disease_filters(), name=request.args.get('q'))
+    return jsonify({
+        'total': bits.bit_count(),
+        'facets': catalogue.facet_counts(bits),
+    })
+
+
+@bp.route('/api/diseases/<card_id>/related', methods=['GET'])
+def get_related_diseases(card_id):
+    """A card's precomputed neighbours, minus any deleted since they were computed.
+
+    The table is rebuilt by imports and ``flask rebuild-related``, not by the
+    write API, so a card created or edited through it may have no or stale
+    neighbours until the next rebuild.
+    """
+    catalogue = get_catalogue()
+    if not catalogue.is_live('diseases', card_id):
+        return jsonify({"error": "Disease not found"}), 404
+    related = guarded(('related', card_id), lambda: RelatedDiseases._get_collection().find_one(
+        {'_id': ObjectId(card_id)}, {'neighbors': 1}, max_time_ms=QUERY_MAX_TIME_MS,
+    ))
+    neighbors = [
+        neighbor for neighbor in (related or {}).get('neighbors', ())
+        if catalogue.is_live('diseases', neighbor['id'])
+    ]
+    return jsonify({'id': card_id, 'related': neighbors})
+
+
+def search_centers(tokens, limit=None):
+    """Centers whose name, location or diseases match ``tokens``, as in ``encoded_matches``."""
+    centers = ProfessionalCenter.objects(search_prefixes__all=tokens).max_time_ms(QUERY_MAX_TIME_MS)
+    return encoded_matches(centers.limit(limit) if limit else centers)
+
+
+def opening_instant():
+    """The instant asked for by ``open_now=true`` or ``open_at=<ISO 8601>``, else None.
+
+    Raises ValueError for an unreadable ``open_at``; a naive time is read as UTC.
+    """
+    open_at = request.args.get('open_at')
+    if open_at:
+        instant = datetime.datetime.fromisoformat(open_at)
+        return instant if instant.tzinfo else instant.replace(tzinfo=datetime.timezone.utc)
+    if request.args.get('open_now', '').lower() in ('1', 'true', 'yes'):
+        return datetime.datetime.now(datetime.timezone.utc)
+    return None
+
+
+@bp.route('/api/professional_centers', methods=['GET'])
 def get_professional_centers():
-    query = request.args.get('q', '').lower()
-    if query:
-        centers = ProfessionalCenter.objects.filter(
-            __raw__={
-                "$or": [
-                    {"name": {"$regex": query, "$options": "i"}},
-                    {"location": {"$regex": query, "$options": "i"}},
-                    {"diseases": {"$elemMatch": {"$regex": query, "$options": "i"}}}
-                ]
-            }
-        )
-    else:
-        centers = ProfessionalCenter.objects()
-    
-    result = []
-    for center in centers:
-        center_dict = center.to_mongo().to_dict()
-        center_dict['id'] = str(center_dict.pop('_id'))
-        result.append(center_dict)
-    
-    return jsonify(result)
-
-
-@app.route('/api/seed_data', methods=['GET'])
-def seed_data():
+    query = request.args.get('q', '')
     try:
-        # First, clear existing collections if you want a clean start (optional)
-        DiseaseCard.objects.delete()
-        ProfessionalCenter.objects.delete()
-
-        disease_data = [
-    {
-        "name": "Stiff Person Syndrome",
-        "symptoms": ["Muscle stiffness", "Severe muscle spasms", "Difficulty walking"],
-        "causes": ["Autoimmune reaction", "Genetic factors", "Environmental triggers"],
-        "treatments": ["Muscle relaxants", "Immunosuppressants", "Physical therapy"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.rarediseases.org"],
-    },
-    {
-        "name": "Kuru",
-        "symptoms": ["Loss of coordination", "Tremors", "Difficulty swallowing"],
-        "causes": ["Prion infection", "Consumption of contaminated human brain tissue"],
-        "treatments": ["No cure, supportive care"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.cdc.gov/prions/kuru"],
-    },
-    {
-        "name": "Fibrodysplasia Ossificans Progressiva (FOP)",
-        "symptoms": ["Progressive loss of mobility", "Bone formation in soft tissues", "Soreness in muscles and joints"],
-        "causes": ["Genetic mutation", "Autosomal dominant inheritance"],
-        "treatments": ["No cure, but symptom management with pain relievers and physical therapy"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.ifopa.org"],
-    },
-    {
-        "name": "Alkaptonuria",
-        "symptoms": ["Dark urine", "Arthritis", "Heart disease"],
-        "causes": ["Deficiency of the enzyme homogentisate oxidase", "Genetic mutation"],
-        "treatments": ["Symptom management", "Joint replacements", "Diet management"],
-        "prevalance": "Very rare",
-        "resourses": ["https://rarediseases.info.nih.gov"],
-    },
-    {
-        "name": "Progeria (Hutchinson-Gilford Progeria Syndrome)",
-        "symptoms": ["Accelerated aging", "Growth failure", "Joint stiffness"],
-        "causes": ["Mutations in the LMNA gene"],
-        "treatments": ["No cure, but supportive treatments"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.progeriaresearch.org"],
-    },
-    {
-        "name": "Hyper IgM Syndrome",
-        "symptoms": ["Recurrent infections", "Severe pneumonia", "Increased risk of autoimmune diseases"],
-        "causes": ["Genetic mutations affecting immune function", "Deficiency of IgM antibodies"],
-        "treatments": ["Antibiotics", "Immunoglobulin replacement therapy", "Stem cell transplant"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.rarediseases.org"],
-    },
-    {
-        "name": "Ondine's Curse (Congenital Central Hypoventilation Syndrome)",
-        "symptoms": ["Inability to sense low oxygen levels", "Sleep apnea", "Irregular breathing patterns"],
-        "causes": ["Genetic mutation affecting oxygen regulation"],
-        "treatments": ["Ventilator support during sleep", "Oxygen therapy"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.rarediseases.org"],
-    },
-    {
-        "name": "Pachyonychia Congenita",
-        "symptoms": ["Thickened nails", "Painful calluses", "Oral leukokeratosis"],
-        "causes": ["Genetic mutations affecting keratin production"],
-        "treatments": ["Pain management", "Skin care", "Orthopedic support"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.pachyonychia.org"],
-    },
-    {
-        "name": "Cushing's Disease",
-        "symptoms": ["Weight gain", "High blood pressure", "Thin skin"],
-        "causes": ["Excess cortisol production", "Pituitary tumor"],
-        "treatments": ["Surgery", "Radiation therapy", "Medications to block cortisol"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.cushingshelp.org"],
-    },
-    {
-        "name": "Ehlers-Danlos Syndrome (EDS)",
-        "symptoms": ["Hyperflexible joints", "Skin that bruises easily", "Chronic pain"],
-        "causes": ["Genetic mutations affecting collagen production"],
-        "treatments": ["Pain management", "Physical therapy", "Surgical interventions for joint stabilization"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.ehlers-danlos.com"],
-    },
-    {
-        "name": "Harlequin Ichthyosis",
-        "symptoms": ["Thick, hard skin", "Red, inflamed patches", "Cracked skin"],
-        "causes": ["Deficiency in the gene responsible for skin production"],
-        "treatments": ["Skin care", "Antibiotic therapy for infections", "Topical treatments"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.ichthyosis.org"],
-    },
-    {
-        "name": "X-Linked Agammaglobulinemia",
-        "symptoms": ["Recurrent infections", "Respiratory infections", "Delayed growth"],
-        "causes": ["Genetic mutation affecting B cell production"],
-        "treatments": ["Immunoglobulin therapy", "Antibiotics", "Bone marrow transplant"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.ninds.nih.gov"],
-    },
-    {
-        "name": "Autoimmune Polyglandular Syndrome Type 1",
-        "symptoms": ["Chronic diarrhea", "Weight loss", "Adrenal insufficiency"],
-        "causes": ["Autoimmune destruction of multiple endocrine glands"],
-        "treatments": ["Hormone replacement therapy", "Corticosteroids", "Immunosuppressants"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.rarediseases.org"],
-    },
-    {
-        "name": "Hypereosinophilic Syndrome",
-        "symptoms": ["Fatigue", "Shortness of breath", "Skin rashes"],
-        "causes": ["Excess eosinophils in the blood", "Idiopathic or secondary causes"],
-        "treatments": ["Corticosteroids", "Chemotherapy", "Immunosuppressive drugs"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.rareconnect.org"],
-    },
-    {
-        "name": "Aicardi Syndrome",
-        "symptoms": ["Seizures", "Cognitive delays", "Eye abnormalities"],
-        "causes": ["X-linked genetic mutation affecting the brain"],
-        "treatments": ["Anticonvulsants", "Physical therapy", "Supportive care"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.aicardisyndrome.org"],
-    },
-    {
-        "name": "Menkes Disease",
-        "symptoms": ["Weak muscle tone", "Seizures", "Cognitive delays"],
-        "causes": ["Deficiency of copper transport protein"],
-        "treatments": ["Copper supplementation", "Supportive care"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.menkes.org"],
-    },
-    {
-        "name": "Wilson's Disease",
-        "symptoms": ["Jaundice", "Liver damage", "Neurological symptoms"],
-        "causes": ["Copper buildup due to defective copper metabolism"],
-        "treatments": ["Copper chelation", "Liver transplant"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.wilsonsdisease.org"],
-    },
-    {
-        "name": "Huntington's Disease",
-        "symptoms": ["Involuntary movements", "Cognitive decline", "Personality changes"],
-        "causes": ["Genetic mutation in the HTT gene"],
-        "treatments": ["Symptom management", "Physical therapy", "Supportive care"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.hdsa.org"],
-    },
-    {
-        "name": "Leber's Hereditary Optic Neuropathy",
-        "symptoms": ["Sudden vision loss", "Color blindness", "Eye pain"],
-        "causes": ["Mitochondrial mutations affecting optic nerve function"],
-        "treatments": ["No cure, but genetic counseling and supportive care"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.lhon.org"],
-    },
-    {
-        "name": "Chronic Fatigue Syndrome (CFS)",
-        "symptoms": ["Extreme fatigue", "Sleep disturbances", "Muscle pain"],
-        "causes": ["Viral infections", "Immune system dysfunction", "Genetic predisposition"],
-        "treatments": ["Symptom management", "Cognitive behavioral therapy", "Exercise therapy"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.cdc.gov/cfs"],
-    },
-    {
-        "name": "Sjögren's Syndrome",
-        "symptoms": ["Dry mouth", "Dry eyes", "Fatigue"],
-        "causes": ["Autoimmune attack on moisture-producing glands"],
-        "treatments": ["Hydration", "Immunosuppressive drugs", "Symptom management"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.sjogrens.org"],
-    },
-    {
-        "name": "Neurofibromatosis Type 1",
-        "symptoms": ["Café-au-lait spots", "Lumps under the skin", "Learning disabilities"],
-        "causes": ["Genetic mutation in the NF1 gene"],
-        "treatments": ["Surgical removal of tumors", "Symptom management"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.nfnetwork.org"],
-    },
-    {
-        "name": "Angelman Syndrome",
-        "symptoms": ["Severe intellectual disability", "Speech impairment", "Seizures"],
-        "causes": ["Deletion of UBE3A gene"],
-        "treatments": ["Behavioral therapy", "Anticonvulsants", "Speech therapy"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.angelman.org"],
-    }
-]
-
-        disease_data.extend([
-    {
-        "name": "Adenylosuccinate Lyase Deficiency",
-        "symptoms": ["Developmental delay", "Severe speech impairment", "Movement disorders"],
-        "causes": ["Deficiency of adenylosuccinate lyase enzyme", "Genetic mutation"],
-        "treatments": ["Symptomatic treatment", "Speech therapy", "Physical therapy"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.rareconnect.org"],
-    },
-    {
-        "name": "Churg-Strauss Syndrome",
-        "symptoms": ["Asthma", "Eosinophilia", "Fatigue"],
-        "causes": ["Autoimmune disease affecting blood vessels", "Allergic reactions"],
-        "treatments": ["Corticosteroids", "Immunosuppressive drugs", "Biologics"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.rarediseases.org"],
-    },
-    {
-        "name": "Focal Segmental Glomerulosclerosis",
-        "symptoms": ["Edema", "Proteinuria", "High blood pressure"],
-        "causes": ["Scarring of kidney tissue", "Genetic factors", "Unknown"],
-        "treatments": ["Steroids", "Immunosuppressive drugs", "Dialysis"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.kidney.org"],
-    },
-    {
-        "name": "Angelman Syndrome",
-        "symptoms": ["Severe intellectual disability", "Seizures", "Speech impairment"],
-        "causes": ["Deletion of UBE3A gene"],
-        "treatments": ["Behavioral therapy", "Speech therapy", "Seizure management"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.angelman.org"],
-    },
-    {
-        "name": "Morgellons Disease",
-        "symptoms": ["Itching", "Skin sores", "Crawling sensations on the skin"],
-        "causes": ["Cause unknown, possibly related to infectious or environmental factors"],
-        "treatments": ["Symptom management", "Antibiotics", "Psychological support"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.morgellons.org"],
-    },
-    {
-        "name": "Gorlin Syndrome (Nevoid Basal Cell Carcinoma Syndrome)",
-        "symptoms": ["Basal cell carcinomas", "Jaw cysts", "Neurofibromas"],
-        "causes": ["Mutations in the PTCH1 gene"],
-        "treatments": ["Surgical removal of tumors", "Skin protection from UV exposure"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.gorlin.org"],
-    },
-    {
-        "name": "Menkes Disease",
-        "symptoms": ["Weak muscle tone", "Seizures", "Cognitive delays"],
-        "causes": ["Copper transport gene mutation"],
-        "treatments": ["Copper supplementation", "Supportive care"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.menkes.org"],
-    },
-    {
-        "name": "DiGeorge Syndrome",
-        "symptoms": ["Heart defects", "Cleft palate", "Immunodeficiency"],
-        "causes": ["Deletion of a portion of chromosome 22"],
-        "treatments": ["Surgical repair of heart defects", "Immunoglobulin therapy", "Speech therapy"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.digeorgesyndrome.org"],
-    },
-    {
-        "name": "Hypohidrotic Ectodermal Dysplasia",
-        "symptoms": ["Hypohidrosis", "Absent or sparse hair", "Missing teeth"],
-        "causes": ["Genetic mutations in ectodermal development"],
-        "treatments": ["Symptom management", "Prosthetic dental implants", "Thermal regulation strategies"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.hedfoundation.org"],
-    },
-    {
-        "name": "Zellweger Syndrome",
-        "symptoms": ["Liver dysfunction", "Neurological impairment", "Developmental delays"],
-        "causes": ["Peroxisome biogenesis disorder due to genetic mutations"],
-        "treatments": ["No cure, symptom management", "Supportive care"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.rarediseases.org"],
-    },
-    {
-        "name": "Hyper IgM Syndrome",
-        "symptoms": ["Recurrent infections", "Respiratory issues", "Delayed growth"],
-        "causes": ["Genetic mutation in immune system regulation"],
-        "treatments": ["Immunoglobulin replacement", "Stem cell transplant", "Antibiotic therapy"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.rarediseases.org"],
-    },
-    {
-        "name": "Osteogenesis Imperfecta",
-        "symptoms": ["Fragile bones", "Frequent fractures", "Short stature"],
-        "causes": ["Defective collagen production", "Genetic mutations"],
-        "treatments": ["Bisphosphonates", "Physical therapy", "Bone surgery"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.oif.org"],
-    },
-    {
-        "name": "Rett Syndrome",
-        "symptoms": ["Loss of purposeful hand movements", "Speech loss", "Severe developmental regression"],
-        "causes": ["Mutation in the MECP2 gene"],
-        "treatments": ["Symptom management", "Physical therapy", "Speech therapy"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.rettsyndrome.org"],
-    },
-    {
-        "name": "Tay-Sachs Disease",
-        "symptoms": ["Severe developmental regression", "Vision and hearing loss", "Seizures"],
-        "causes": ["Deficiency in hexosaminidase A enzyme"],
-        "treatments": ["No cure, supportive care"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.taysachs.org"],
-    },
-    {
-        "name": "Shwachman-Diamond Syndrome",
-        "symptoms": ["Pancreatic insufficiency", "Bone marrow failure", "Growth retardation"],
-        "causes": ["Mutation in the SBDS gene"],
-        "treatments": ["Pancreatic enzyme replacement", "Blood transfusions", "Bone marrow transplant"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.shwachman-diamond.org"],
-    },
-    {
-        "name": "Lysosomal Acid Lipase Deficiency",
-        "symptoms": ["Fatty liver", "Abnormal cholesterol levels", "Growth failure"],
-        "causes": ["Deficiency of the enzyme lysosomal acid lipase"],
-        "treatments": ["Enzyme replacement therapy", "Liver transplant"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.rarediseases.org"],
-    },
-    {
-        "name": "Neurofibromatosis Type 2",
-        "symptoms": ["Hearing loss", "Tinnitus", "Balance problems"],
-        "causes": ["Mutation in the NF2 gene"],
-        "treatments": ["Surgical removal of tumors", "Hearing aids", "Physical therapy"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.nf2is.org"],
-    },
-    {
-        "name": "Tuberous Sclerosis Complex",
-        "symptoms": ["Seizures", "Developmental delays", "Skin lesions"],
-        "causes": ["Genetic mutations affecting tumor suppression genes"],
-        "treatments": ["Anticonvulsants", "Surgical removal of tumors", "Symptom management"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.tsalliance.org"],
-    },
-    {
-        "name": "Bardet-Biedl Syndrome",
-        "symptoms": ["Vision loss", "Obesity", "Polydactyly"],
-        "causes": ["Genetic mutations affecting cilia function"],
-        "treatments": ["Symptom management", "Weight control", "Vision aids"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.bardetbiedl.org"],
-    },
-    {
-        "name": "Noonan Syndrome",
-        "symptoms": ["Heart defects", "Short stature", "Learning difficulties"],
-        "causes": ["Genetic mutations affecting RAS-MAPK signaling pathway"],
-        "treatments": ["Surgical interventions", "Growth hormone therapy", "Cardiac care"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.raisingnoonan.org"],
-    },
-    {
-        "name": "Batten Disease",
-        "symptoms": ["Seizures", "Vision loss", "Cognitive decline"],
-        "causes": ["Genetic mutations affecting lysosomal function"],
-        "treatments": ["No cure, but symptomatic care"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.bdsra.org"],
-    },
-    {
-        "name": "Cystinosis",
-        "symptoms": ["Kidney failure", "Corneal crystals", "Delayed growth"],
-        "causes": ["Deficiency in cystinosin, leading to cystine accumulation"],
-        "treatments": ["Cystine-depleting drugs", "Kidney transplant", "Supportive care"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.cystinosis.org"],
-    }
-])
-
-        disease_data.extend([
-    {
-        "name": "Alkaptonuria",
-        "symptoms": ["Dark urine", "Osteoarthritis", "Pigmented connective tissue"],
-        "causes": ["Deficiency of homogentisate 1,2-dioxygenase enzyme"],
-        "treatments": ["Symptom management", "Pain relief", "Joint replacement surgery"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.alkaptonuria.org"],
-    },
-    {
-        "name": "Lesch-Nyhan Syndrome",
-        "symptoms": ["Self-mutilation", "Gout", "Neurological impairment"],
-        "causes": ["Deficiency of hypoxanthine-guanine phosphoribosyltransferase"],
-        "treatments": ["Symptom management", "Psychiatric care", "Gout treatment"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.lns-foundation.org"],
-    },
-    {
-        "name": "Friedreich's Ataxia",
-        "symptoms": ["Ataxia", "Muscle weakness", "Vision and hearing loss"],
-        "causes": ["Deficiency of frataxin due to genetic mutations"],
-        "treatments": ["Physical therapy", "Cardiac care", "Supportive care"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.curefa.org"],
-    },
-    {
-        "name": "Cystic Fibrosis",
-        "symptoms": ["Chronic cough", "Frequent lung infections", "Poor growth"],
-        "causes": ["Mutation in the CFTR gene"],
-        "treatments": ["Chest physiotherapy", "Enzyme replacement", "Lung transplant"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.cff.org"],
-    },
-    {
-        "name": "Huntington's Disease",
-        "symptoms": ["Chorea", "Cognitive decline", "Mood swings"],
-        "causes": ["Mutation of the HTT gene"],
-        "treatments": ["Symptomatic treatment", "Physical therapy", "Psychiatric care"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.hdsa.org"],
-    },
-    {
-        "name": "Pachyonychia Congenita",
-        "symptoms": ["Thickened nails", "Painful calluses", "Oral leukokeratosis"],
-        "causes": ["Mutation in the keratin genes"],
-        "treatments": ["Pain management", "Surgical removal of calluses", "Podiatric care"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.pachyonychia.org"],
-    },
-    {
-        "name": "Gaucher's Disease",
-        "symptoms": ["Enlarged liver and spleen", "Bone pain", "Fatigue"],
-        "causes": ["Deficiency of glucocerebrosidase enzyme"],
-        "treatments": ["Enzyme replacement therapy", "Bone pain management"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.gaucherdisease.org"],
-    },
-    {
-        "name": "Prader-Willi Syndrome",
-        "symptoms": ["Insatiable appetite", "Obesity", "Cognitive impairment"],
-        "causes": ["Loss of function of genes on chromosome 15"],
-        "treatments": ["Dietary management", "Growth hormone therapy", "Behavioral therapy"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.pwsausa.org"],
-    },
-    {
-        "name": "Wolfram Syndrome",
-        "symptoms": ["Diabetes insipidus", "Optic atrophy", "Sensorineural hearing loss"],
-        "causes": ["Mutation in the WFS1 gene"],
-        "treatments": ["Insulin therapy", "Visual aids", "Hearing aids"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.wolframsyndrome.org"],
-    },
-    {
-        "name": "Alport Syndrome",
-        "symptoms": ["Progressive kidney disease", "Hearing loss", "Eye abnormalities"],
-        "causes": ["Mutations in collagen genes affecting kidney function"],
-        "treatments": ["Kidney transplant", "Hearing aids", "Supportive care"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.alportsyndrome.org"],
-    },
-    {
-        "name": "Batten Disease",
-        "symptoms": ["Seizures", "Cognitive decline", "Vision loss"],
-        "causes": ["Mutations in lysosomal storage genes"],
-        "treatments": ["Symptom management", "Seizure control"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.bdsra.org"],
-    },
-    {
-        "name": "Klinefelter Syndrome",
-        "symptoms": ["Infertility", "Learning difficulties", "Low testosterone"],
-        "causes": ["Extra X chromosome in males (XXY genotype)"],
-        "treatments": ["Testosterone replacement therapy", "Speech therapy", "Fertility treatments"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.klinefeltersyndrome.org"],
-    },
-    {
-        "name": "Cohen Syndrome",
-        "symptoms": ["Developmental delay", "Coarse facial features", "Retinal degeneration"],
-        "causes": ["Mutation in the COH1 gene"],
-        "treatments": ["Speech therapy", "Physical therapy", "Vision aids"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.cohensyndrome.org"],
-    },
-    {
-        "name": "Mechel's Syndrome",
-        "symptoms": ["Microcephaly", "Seizures", "Eye abnormalities"],
-        "causes": ["Mutation in the MKS1 gene"],
-        "treatments": ["Symptomatic treatment", "Seizure management"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.mksfoundation.org"],
-    },
-    {
-        "name": "Menke's Syndrome",
-        "symptoms": ["Hypotonia", "Seizures", "Developmental delay"],
-        "causes": ["Deficiency of copper transport"],
-        "treatments": ["Copper supplementation", "Supportive care"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.menkessyndrome.org"],
-    },
-    {
-        "name": "Osteopetrosis",
-        "symptoms": ["Bone pain", "Bone fractures", "Delayed growth"],
-        "causes": ["Defective osteoclast function leading to dense bones"],
-        "treatments": ["Bone marrow transplant", "Symptomatic treatment"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.osteopetrosis.org"],
-    },
-    {
-        "name": "Leigh Syndrome",
-        "symptoms": ["Developmental regression", "Respiratory problems", "Movement disorders"],
-        "causes": ["Mitochondrial mutations"],
-        "treatments": ["Symptom management", "Respiratory support", "Nutritional support"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.leighsyndrome.org"],
-    },
-    {
-        "name": "Williams Syndrome",
-        "symptoms": ["Cardiovascular problems", "Developmental delays", "Hypercalcemia"],
-        "causes": ["Deletion of genes on chromosome 7"],
-        "treatments": ["Cardiovascular management", "Speech therapy", "Physical therapy"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.williams-syndrome.org"],
-    },
-    {
-        "name": "Sickle Cell Disease",
-        "symptoms": ["Pain episodes", "Fatigue", "Anemia"],
-        "causes": ["Mutation in the hemoglobin gene"],
-        "treatments": ["Pain management", "Hydroxyurea", "Blood transfusions"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.sicklecelldisease.org"],
-    },
-    {
-        "name": "Kawasaki Disease",
-        "symptoms": ["Fever", "Rash", "Conjunctivitis"],
-        "causes": ["Unknown, possibly autoimmune or infection-triggered"],
-        "treatments": ["IV immunoglobulin", "Aspirin therapy"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.kdfoundation.org"],
-    },
-    {
-        "name": "Prion Disease",
-        "symptoms": ["Rapid mental deterioration", "Motor issues", "Memory loss"],
-        "causes": ["Misfolded prion proteins"],
-        "treatments": ["No cure, symptom management"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.cjd-foundation.org"],
-    },
-])
-
-        disease_data.extend([
-    {
-        "name": "Alexander Disease",
-        "symptoms": ["Seizures", "Muscle weakness", "Cognitive decline"],
-        "causes": ["Mutation in the GFAP gene"],
-        "treatments": ["Symptom management", "Physical therapy", "Anticonvulsants"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.alexanderdisease.org"],
-    },
-    {
-        "name": "Bardet-Biedl Syndrome",
-        "symptoms": ["Obesity", "Retinal degeneration", "Polydactyly"],
-        "causes": ["Mutations in multiple genes involved in cilia function"],
-        "treatments": ["Symptom management", "Vision aids", "Weight management"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.bardetbiedl.org"],
-    },
-    {
-        "name": "Rett Syndrome",
-        "symptoms": ["Loss of motor skills", "Repetitive hand movements", "Speech loss"],
-        "causes": ["Mutations in the MECP2 gene"],
-        "treatments": ["Physical therapy", "Speech therapy", "Seizure management"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.rettsyndrome.org"],
-    },
-    {
-        "name": "Menkes Syndrome",
-        "symptoms": ["Copper deficiency", "Hypotonia", "Seizures"],
-        "causes": ["Mutation in the ATP7A gene affecting copper transport"],
-        "treatments": ["Copper supplementation", "Supportive care"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.menkessyndrome.org"],
-    },
-    {
-        "name": "Hypophosphatasia",
-        "symptoms": ["Brittle bones", "Premature loss of teeth", "Short stature"],
-        "causes": ["Deficiency in the tissue-nonspecific alkaline phosphatase enzyme"],
-        "treatments": ["Enzyme replacement therapy", "Pain management"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.hypophosphatasia.org"],
-    },
-    {
-        "name": "Hyper IgM Syndrome",
-        "symptoms": ["Frequent infections", "Low immunoglobulin levels", "Fatigue"],
-        "causes": ["Deficiency in CD40 ligand affecting immune function"],
-        "treatments": ["Antibiotics", "Immunoglobulin replacement", "Stem cell transplant"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.hyperigm.org"],
-    },
-    {
-        "name": "Pinealoma",
-        "symptoms": ["Headache", "Vision problems", "Hormonal imbalance"],
-        "causes": ["Tumors in the pineal gland"],
-        "treatments": ["Surgical removal", "Radiation therapy"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.pinealoma.org"],
-    },
-    {
-        "name": "Spinal Muscular Atrophy",
-        "symptoms": ["Progressive muscle weakness", "Loss of motor skills", "Respiratory failure"],
-        "causes": ["Mutation in the SMN1 gene affecting motor neurons"],
-        "treatments": ["Gene therapy", "Physical therapy", "Respiratory support"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.curesma.org"],
-    },
-    {
-        "name": "Niemann-Pick Disease",
-        "symptoms": ["Enlarged liver and spleen", "Cognitive decline", "Movement problems"],
-        "causes": ["Deficiency of acid sphingomyelinase"],
-        "treatments": ["Symptom management", "Liver transplant", "Supportive care"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.nnpdf.org"],
-    },
-    {
-        "name": "Ondine's Curse",
-        "symptoms": ["Failure to breathe during sleep", "Hypoventilation", "Cyanosis"],
-        "causes": ["Deficiency in automatic control of breathing"],
-        "treatments": ["Ventilatory support", "Positive pressure therapy"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.ondinescurse.org"],
-    },
-    {
-        "name": "Syringomyelia",
-        "symptoms": ["Pain", "Muscle weakness", "Loss of sensation"],
-        "causes": ["Fluid-filled cysts in the spinal cord"],
-        "treatments": ["Surgery", "Pain management", "Physical therapy"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.syringomyelia.org"],
-    },
-    {
-        "name": "Ehlers-Danlos Syndrome",
-        "symptoms": ["Hyperflexible joints", "Skin hyper-elasticity", "Frequent bruising"],
-        "causes": ["Defects in collagen synthesis"],
-        "treatments": ["Physical therapy", "Pain management", "Surgical intervention for joint issues"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.ehlers-danlos.com"],
-    },
-    {
-        "name": "FOP (Fibrodysplasia Ossificans Progressiva)",
-        "symptoms": ["Progressive bone formation", "Immobility", "Painful swelling"],
-        "causes": ["Mutations in the ACVR1 gene"],
-        "treatments": ["Symptom management", "Pain control", "Mobility aids"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.ifopa.org"],
-    },
-    {
-        "name": "Cerebrotendinous Xanthomatosis",
-        "symptoms": ["Neurological issues", "Tendon xanthomas", "Ataxia"],
-        "causes": ["Defective cholesterol metabolism"],
-        "treatments": ["Cholesterol-lowering drugs", "Symptom management"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.cerebrotendinous.org"],
-    },
-    {
-        "name": "Churg-Strauss Syndrome",
-        "symptoms": ["Asthma", "Eosinophilia", "Vasculitis"],
-        "causes": ["Autoimmune disease affecting small blood vessels"],
-        "treatments": ["Steroids", "Immunosuppressive therapy", "Symptom management"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.churgstrausssyndrome.org"],
-    },
-    {
-        "name": "Hermansky-Pudlak Syndrome",
-        "symptoms": ["Bleeding issues", "Albinism", "Pulmonary fibrosis"],
-        "causes": ["Defects in lysosomal function"],
-        "treatments": ["Bone marrow transplant", "Bleeding disorder management"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.hpsnetwork.org"],
-    },
-    {
-        "name": "Celiac Disease",
-        "symptoms": ["Diarrhea", "Abdominal pain", "Fatigue"],
-        "causes": ["Gluten intolerance triggering immune response"],
-        "treatments": ["Gluten-free diet"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.celiac.org"],
-    },
-    {
-        "name": "Marfan Syndrome",
-        "symptoms": ["Tall stature", "Heart issues", "Flexible joints"],
-        "causes": ["Mutation in the fibrillin-1 gene affecting connective tissue"],
-        "treatments": ["Cardiovascular care", "Physical therapy", "Surgical intervention for aortic issues"],
-        "prevalance": "Rare",
-        "resourses": ["https://www.marfan.org"],
-    },
-    {
-        "name": "Hematohidrosis",
-        "symptoms": ["Sweating blood", "Headaches", "Fatigue"],
-        "causes": ["Extreme stress causing blood vessels to rupture"],
-        "treatments": ["Stress management", "Symptom relief"],
-        "prevalance": "Extremely rare",
-        "resourses": ["https://www.hematohidrosis.org"],
-    },
-    {
-        "name": "Vascular Ehlers-Danlos Syndrome",
-        "symptoms": ["Thin skin", "Easy bruising", "Vascular rupture"],
-        "causes": ["Mutation in the COL3A1 gene affecting collagen synthesis"],
-        "treatments": ["Cardiovascular care", "Surgical repair of ruptured vessels"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.vedsfoundation.org"],
-    },
-    {
-        "name": "Batten Disease",
-        "symptoms": ["Seizures", "Vision loss", "Cognitive decline"],
-        "causes": ["Lysosomal storage disorders"],
-        "treatments": ["Seizure management", "Supportive care"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.bdsra.org"],
-    },
-    {
-        "name": "Tay-Sachs Disease",
-        "symptoms": ["Progressive mental and physical deterioration", "Cherry-red spot in the eyes", "Deafness"],
-        "causes": ["Deficiency of hexosaminidase A enzyme"],
-        "treatments": ["Symptom management", "Palliative care"],
-        "prevalance": "Very rare",
-        "resourses": ["https://www.ntsad.org"],
-    },
-])
-
-
-        for item in disease_data:
-            DiseaseCard(
-                name=item['name'],
-                symptoms=item['symptoms'],
-                causes=item['causes'],
-                treatments=item['treatments'],
-                prevalance=item['prevalance'],
-                resourses=item['resourses']
-            ).save()
-
-        professional_centers_data = [
-    {
-        "name": "Toronto Rare Disease Clinic",
-        "location": "Toronto, Ontario, Canada",
-        "google_maps_embed": "https://maps.google.com/?q=Toronto+Rare+Disease+Clinic",
-        "diseases": ["Diabetes", "Hypertension"],
-        "contact_info": {
-            "phone": "+1 416-555-1234",
-            "email": "info@torontorarediseaseclinic.ca",
-            "website": "https://torontorarediseaseclinic.ca"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
-    },
-    {
-        "name": "Los Angeles Center for Rare Diseases",
-        "location": "Los Angeles, California, USA",
-        "google_maps_embed": "https://maps.google.com/?q=Los+Angeles+Center+for+Rare+Diseases",
-        "diseases": ["Asthma", "Alzheimer's Disease"],
-        "contact_info": {
-            "phone": "+1 213-555-5678",
-            "email": "contact@lararediseasecenter.org",
-            "website": "https://lararediseasecenter.org"
-        },
-        "hours_of_operation": "24/7"
-    },
-    {
-        "name": "Mexico City Rare Disorders Institute",
-        "location": "Mexico City, Mexico",
-        "google_maps_embed": "https://maps.google.com/?q=Mexico+City+Rare+Disorders+Institute",
-        "diseases": ["Tuberculosis", "COVID-19"],
-        "contact_info": {
-            "phone": "+52 55 1234 5678",
-            "email": "atencion@institutoraredisorders.mx",
-            "website": "https://institutoraredisorders.mx"
-        },
-        "hours_of_operation": "8am - 6pm Mon-Sat"
-    },
-    {
-        "name": "London Rare Disease Center",
-        "location": "London, England, UK",
-        "google_maps_embed": "https://maps.google.com/?q=London+Rare+Disease+Center",
-        "diseases": ["Cystic Fibrosis", "Gaucher's Disease"],
-        "contact_info": {
-            "phone": "+44 20 7946 1234",
-            "email": "contact@londonrarediseasecentre.org",
-            "website": "https://londonrarediseasecentre.org"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
-    },
-    {
-        "name": "Paris Institute for Rare Diseases",
-        "location": "Paris, France",
-        "google_maps_embed": "https://maps.google.com/?q=Paris+Institute+for+Rare+Diseases",
-        "diseases": ["Marfan Syndrome", "Duchenne Muscular Dystrophy"],
-        "contact_info": {
-            "phone": "+33 1 70 18 62 94",
-            "email": "contact@rare-diseases-paris.fr",
-            "website": "https://rare-diseases-paris.fr"
-        },
-        "hours_of_operation": "9am - 6pm Mon-Fri"
-    },
-    {
-        "name": "Berlin Rare Disease Treatment Center",
-        "location": "Berlin, Germany",
-        "google_maps_embed": "https://maps.google.com/?q=Berlin+Rare+Disease+Treatment+Center",
-        "diseases": ["Huntington's Disease", "Wilson's Disease"],
-        "contact_info": {
-            "phone": "+49 30 12345678",
-            "email": "info@berlinrarediseasecenter.de",
-            "website": "https://berlinrarediseasecenter.de"
-        },
-        "hours_of_operation": "8am - 4pm Mon-Fri"
-    },
-    {
-        "name": "New York Rare Disease Research Institute",
-        "location": "New York, New York, USA",
-        "google_maps_embed": "https://maps.google.com/?q=New+York+Rare+Disease+Research+Institute",
-        "diseases": ["Multiple Sclerosis", "Amyotrophic Lateral Sclerosis"],
-        "contact_info": {
-            "phone": "+1 212-555-9876",
-            "email": "info@nyrareinstitute.org",
-            "website": "https://nyrareinstitute.org"
-        },
-        "hours_of_operation": "9am - 6pm Mon-Fri"
-    },
-    {
-        "name": "Sydney Rare Disease Clinic",
-        "location": "Sydney, New South Wales, Australia",
-        "google_maps_embed": "https://maps.google.com/?q=Sydney+Rare+Disease+Clinic",
-        "diseases": ["Ehlers-Danlos Syndrome", "Fabry Disease"],
-        "contact_info": {
-            "phone": "+61 2 1234 5678",
-            "email": "contact@sydneyrarediseaseclinic.com.au",
-            "website": "https://sydneyrarediseaseclinic.com.au"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
-    },
-    {
-        "name": "Toronto Neurology and Rare Disease Center",
-        "location": "Toronto, Ontario, Canada",
-        "google_maps_embed": "https://maps.google.com/?q=Toronto+Neurology+and+Rare+Disease+Center",
-        "diseases": ["Parkinson's Disease", "Neurofibromatosis"],
-        "contact_info": {
-            "phone": "+1 416-555-7890",
-            "email": "contact@torontoneurologycenter.ca",
-            "website": "https://torontoneurologycenter.ca"
-        },
-        "hours_of_operation": "8am - 6pm Mon-Fri"
-    },
-    {
-        "name": "São Paulo Rare Disease Center",
-        "location": "São Paulo, Brazil",
-        "google_maps_embed": "https://maps.google.com/?q=São+Paulo+Rare+Disease+Center",
-        "diseases": ["Hemophilia", "Spinal Muscular Atrophy"],
-        "contact_info": {
-            "phone": "+55 11 1234 5678",
-            "email": "contato@sprarecenter.com.br",
-            "website": "https://sprarecenter.com.br"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
-    },
-    {
-        "name": "Madrid Rare Disease Institute",
-        "location": "Madrid, Spain",
-        "google_maps_embed": "https://maps.google.com/?q=Madrid+Rare+Disease+Institute",
-        "diseases": ["Tay-Sachs Disease", "Menkes Syndrome"],
-        "contact_info": {
-            "phone": "+34 91 123 4567",
-            "email": "contact@madridraredisease.org",
-            "website": "https://madridraredisease.org"
-        },
-        "hours_of_operation": "8am - 4pm Mon-Fri"
-    },
-    {
-        "name": "Dubai Rare Disease Center",
-        "location": "Dubai, United Arab Emirates",
-        "google_maps_embed": "https://maps.google.com/?q=Dubai+Rare+Disease+Center",
-        "diseases": ["Cystic Fibrosis", "Batten Disease"],
-        "contact_info": {
-            "phone": "+971 4 123 4567",
-            "email": "info@dubairarediseasecenter.ae",
-            "website": "https://dubairarediseasecenter.ae"
-        },
-        "hours_of_operation": "9am - 5pm Sun-Thurs"
-    },
-    {
-        "name": "Mumbai Rare Disease Clinic",
-        "location": "Mumbai, Maharashtra, India",
-        "google_maps_embed": "https://maps.google.com/?q=Mumbai+Rare+Disease+Clinic",
-        "diseases": ["Progeria", "Celiac Disease"],
-        "contact_info": {
-            "phone": "+91 22 1234 5678",
-            "email": "contact@mumbai.rarediseaseclinic.in",
-            "website": "https://mumbai.rarediseaseclinic.in"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Sat"
-    },
-    {
-        "name": "Hong Kong Rare Disease Treatment Center",
-        "location": "Hong Kong",
-        "google_maps_embed": "https://maps.google.com/?q=Hong+Kong+Rare+Disease+Treatment+Center",
-        "diseases": ["Albinism", "Alpha-1 Antitrypsin Deficiency"],
-        "contact_info": {
-            "phone": "+852 1234 5678",
-            "email": "contact@hongkongrarecenter.hk",
-            "website": "https://hongkongrarecenter.hk"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
-    },
-    {
-        "name": "Seoul Rare Disease Institute",
-        "location": "Seoul, South Korea",
-        "google_maps_embed": "https://maps.google.com/?q=Seoul+Rare+Disease+Institute",
-        "diseases": ["Osteogenesis Imperfecta", "Lysosomal Storage Disorders"],
-        "contact_info": {
-            "phone": "+82 2 1234 5678",
-            "email": "contact@seoulraredisease.org",
-            "website": "https://seoulraredisease.org"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
-    },
-    {
-        "name": "Tokyo Rare Disease Center",
-        "location": "Tokyo, Japan",
-        "google_maps_embed": "https://maps.google.com/?q=Tokyo+Rare+Disease+Center",
-        "diseases": ["Spinal Muscular Atrophy", "Neurodegenerative Diseases"],
-        "contact_info": {
-            "phone": "+81 3 1234 5678",
-            "email": "info@tokyorarediseasecenter.jp",
-            "website": "https://tokyorarediseasecenter.jp"
-        },
-        "hours_of_operation": "9am - 6pm Mon-Fri"
-    },
-    {
-        "name": "Cape Town Rare Disease Institute",
-        "location": "Cape Town, South Africa",
-        "google_maps_embed": "https://maps.google.com/?q=Cape+Town+Rare+Disease+Institute",
-        "diseases": ["Tuberous Sclerosis", "Ehlers-Danlos Syndrome"],
-        "contact_info": {
-            "phone": "+27 21 123 4567",
-            "email": "info@capetownraredisease.org",
-            "website": "https://capetownraredisease.org"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
-    },
-    {
-        "name": "Moscow Rare Disease Clinic",
-        "location": "Moscow, Russia",
-        "google_maps_embed": "https://maps.google.com/?q=Moscow+Rare+Disease+Clinic",
-        "diseases": ["Sickle Cell Anemia", "Huntington's Disease"],
-        "contact_info": {
-            "phone": "+7 495 123 4567",
-            "email": "contact@moscowrarediseaseclinic.ru",
-            "website": "https://moscowrarediseaseclinic.ru"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
-    },
-    {
-        "name": "Rome Rare Disease Center",
-        "location": "Rome, Italy",
-        "google_maps_embed": "https://maps.google.com/?q=Rome+Rare+Disease+Center",
-        "diseases": ["Hemophilia", "Marfan Syndrome"],
-        "contact_info": {
-            "phone": "+39 06 1234 5678",
-            "email": "info@romeraresdiseasecenter.it",
-            "website": "https://romeraresdiseasecenter.it"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
-    },
-    {
-        "name": "Vienna Rare Disease Institute",
-        "location": "Vienna, Austria",
-        "google_maps_embed": "https://maps.google.com/?q=Vienna+Rare+Disease+Institute",
-        "diseases": ["Tay-Sachs Disease", "Lynch Syndrome"],
-        "contact_info": {
-            "phone": "+43 1 12345678",
-            "email": "contact@viennararesdisease.org",
-            "website": "https://viennararesdisease.org"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
-    },
-    {
-        "name": "Zurich Rare Disease Center",
-        "location": "Zurich, Switzerland",
-        "google_maps_embed": "https://maps.google.com/?q=Zurich+Rare+Disease+Center",
-        "diseases": ["Von Willebrand Disease", "Pulmonary Arterial Hypertension"],
-        "contact_info": {
-            "phone": "+41 44 123 4567",
-            "email": "info@zurichrarediseasecenter.ch",
-            "website": "https://zurichrarediseasecenter.ch"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
-    },
-    {
-        "name": "Beijing Rare Disease Clinic",
-        "location": "Beijing, China",
-        "google_maps_embed": "https://maps.google.com/?q=Beijing+Rare+Disease+Clinic",
-        "diseases": ["Hemophilia", "Cystic Fibrosis"],
-        "contact_info": {
-            "phone": "+86 10 1234 5678",
-            "email": "info@beijingrarediseaseclinic.cn",
-            "website": "https://beijingrarediseaseclinic.cn"
-        },
-        "hours_of_operation": "9am - 6pm Mon-Fri"
-    },
-    {
-        "name": "Singapore Rare Disease Center",
-        "location": "Singapore",
-        "google_maps_embed": "https://maps.google.com/?q=Singapore+Rare+Disease+Center",
-        "diseases": ["Thalassemia", "Duchenne Muscular Dystrophy"],
-        "contact_info": {
-            "phone": "+65 1234 5678",
-            "email": "info@singaporeraredisease.org",
-            "website": "https://singaporeraredisease.org"
-        },
-        "hours_of_operation": "9am - 5pm Mon-Fri"
+        instant = opening_instant()
+    except ValueError:
+        return jsonify({"error": "open_at must be an ISO 8601 date and time"}), 400
+
+    if not query:
+        catalogue = get_catalogue()
+        bits = None if instant is None else catalogue.open_centers(instant)
+        return json_response(catalogue.json_array('centers', bits))
+
+    tokens = query_tokens(query)
+    centers = guarded(('centers', tuple(tokens)), lambda: search_centers(tokens)) if tokens else []
+    if instant is not None:
+        catalogue = get_catalogue()
+        open_bits = catalogue.open_centers(instant)
+        positions = catalogue.positions['centers']
+        centers = [
+            center for center in centers
+            if center[0] in positions and open_bits >> positions[center[0]] & 1
+        ]
+    return json_response(b'[' + b','.join(encoded for _, _, encoded in centers) + b']')
+
+
+@bp.route('/api/search', methods=['GET'])
+def search():
+    """Diseases and centers matching ``q`` as one ranked list.
+
+    Both collections are queried at once on the guarded query pool. A side
+    that has not answered within SEARCH_DEADLINE is served from its last
+    good result, or else left out and named in ``incomplete``, so a slow
+    side delays the response by at most the deadline and never hides the
+    other side's results.
+
+    Each side fetches at most ``limit`` matches, and those are what get
+    ranked, so ``total`` counts the matches fetched, not every match.
+    """
+    tokens = query_tokens(request.args.get('q', ''))
+    if not tokens:
+        return jsonify({"error": "q is required"}), 400
+    try:
+        limit = min(int(request.args.get('limit', '20')), SEARCH_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be at least 1"}), 400
+
+    keys = {'disease': disease_search_key(tokens) + (limit,), 'center': ('centers', tuple(tokens), limit)}
+    futures = {
+        'disease': _queries.submit(keys['disease'], lambda: search_diseases(tokens, limit=limit)),
+        'center': _queries.submit(keys['center'], lambda: search_centers(tokens, limit=limit)),
     }
-]
+    wait([future for future in futures.values() if future is not None], timeout=SEARCH_DEADLINE)
 
+    hits = []
+    incomplete = []
+    for kind, future in futures.items():
+        try:
+            # Already waited: a side that isn't done is answered from its last good result
+            matched, age = _queries.result(keys[kind], future, timeout=0)
+        except QueryUnavailable:
+            incomplete.append(kind)
+            continue
+        if age is not None:
+            mark_stale(age)
+        hits.extend((name_score(tokens, name), name, kind, encoded) for _, name, encoded in matched)
+    if len(incomplete) == len(futures):
+        return jsonify({"error": "Search timed out", "incomplete": incomplete}), 504
 
-        for center in professional_centers_data:
-            ProfessionalCenter(
-                name=center['name'],
-                location=center['location'],
-                google_maps_embed=center['google_maps_embed'],
-                diseases=center['diseases'],
-                contact_info=center['contact_info'],
-                hours_of_operation=center['hours_of_operation']
-            ).save()
+    # Best name match first; diseases before centers on a tie, then alphabetical
+    hits.sort(key=lambda hit: (-hit[0], hit[2] != 'disease', hit[1].casefold()))
+    results = b','.join(
+        b'{"type":"%s","score":%d,"item":%s}' % (kind.encode(), score, encoded)
+        for score, _, kind, encoded in hits[:limit]
+    )
+    header = json.dumps({'total': len(hits), 'partial': bool(incomplete), 'incomplete': incomplete})
+    return json_response(header[:-1].encode() + b',"results":[' + results + b']}')
 
-        return jsonify({"message": "Database seeded successfully!"})
 
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehind(apply_writes)
+            _writer.start()
+        return _writer
+
+
+def write_denied():
+    if not WRITE_API_TOKEN:
+        return jsonify({"error": "Write API is disabled"}), 403
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip(), WRITE_API_TOKEN):
+        return jsonify({"error": "Invalid or missing write token"}), 401
+    return None
+
+
+def expected_revision(body):
+    """The revision a PATCH/DELETE was based on, from If-Match or the body's ``revision``."""
+    value = request.headers.get('If-Match') or (body or {}).get('revision')
+    if value is None:
+        return None
+    return int(str(value).removeprefix('W/').strip('"'))
+
 
+def run_write(op):
+    if not get_writer().submit(op):
+        return jsonify({"error": "Write not confirmed in time; it may still be applied"}), 504
+    if op.status == 204:
+        return Response(status=204)
+    if op.status not in (200, 201):
+        return jsonify(op.body), op.status
+    response = jsonify(public_document(op.body))
+    response.status_code = op.status
+    response.headers['ETag'] = '"%d"' % op.body['revision']
+    return response
 
 
+@bp.route('/api/diseases', methods=['POST'], defaults={'kind': 'diseases'})
+@bp.route('/api/professional_centers', methods=['POST'], defaults={'kind': 'professional_centers'})
+def create_record(kind):
+    denied = write_denied()
+    if denied:
+        return denied
+    body = request.get_json(silent=True)
+    record, errors = normalize_record(kind, body)
+    if errors:
+        return jsonify({"error": "Invalid record", "errors": errors}), 400
+    return run_write(WriteOp(WRITE_MODELS[kind], kind, 'insert', fields=record))
 
-if __name__ == '__main__':
+
+@bp.route('/api/diseases/<record_id>', methods=['PATCH', 'DELETE'], defaults={'kind': 'diseases'})
+@bp.route('/api/professional_centers/<record_id>', methods=['PATCH', 'DELETE'], defaults={'kind': 'professional_centers'})
+def change_record(kind, record_id):
+    """Update some fields of, or delete, one record at the revision the client last saw."""
+    denied = write_denied()
+    if denied:
+        return denied
+    if not ObjectId.is_valid(record_id):
+        return jsonify({"error": "Record not found"}), 404
+    body = request.get_json(silent=True) if request.method == 'PATCH' else None
+    if request.method == 'PATCH' and not isinstance(body, dict):
+        return jsonify({"error": "Body must be a JSON object"}), 400
     try:
-        connect('rare_diseases', host=os.getenv('MONGO_URI'))
-        print("MongoDB connection successful!")
-    except Exception as e:
-        print("MongoDB connection failed:", e)
-    app.run(debug=True)
+        expected = expected_revision(body)
+    except ValueError:
+        return jsonify({"error": "revision must be an integer"}), 400
+    if expected is None:
+        return jsonify({"error": "Send the revision being changed as If-Match or \"revision\""}), 428
+
+    model = WRITE_MODELS[kind]
+    if request.method == 'DELETE':
+        return run_write(WriteOp(model, kind, 'delete', record_id, expected))
+    fields = {name: value for name, value in body.items() if name != 'revision'}
+    unknown = sorted(set(fields) - set(editable_fields(kind)))
+    if unknown or not fields:
+        return jsonify({"error": "Fields that can be changed: " + ", ".join(editable_fields(kind))}), 400
+    return run_write(WriteOp(model, kind, 'patch', record_id, expected, fields))
+
+
+@bp.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Per-worker counters."""
+    metrics = {'singleflight': _searches.stats(), 'queries': _queries.stats()}
+    if _writer is not None:
+        metrics['write_behind'] = _writer.stats()
+    return jsonify(metrics)
+
+
+@bp.route('/api/changes', methods=['GET'])
+def get_changes():
+    """Records inserted, updated and deleted after revision ``since``.
+
+    Clients store the returned ``revision`` and pass it as ``since`` on the
+    next sync; ``since=0`` returns the whole catalogue as inserts. The
+    revision is a watermark below any write still in flight, and only
+    changes up to it are returned, so a write that lands after this reply
+    still has a revision above it.
 
+    Deletions are only kept for TOMBSTONE_RETENTION_DAYS: a ``since`` below
+    the newest pruned one gets 410, and the client must sync from 0 again.
+    """
+    try:
+        since = int(request.args.get('since', '0'))
+    except ValueError:
+        return jsonify({"error": "since must be an integer revision"}), 400
+    horizon = tombstone_horizon()
+    if 0 < since < horizon:
+        return jsonify({
+            "error": "Deletions before this revision are no longer kept; sync again from since=0",
+            "horizon": horizon,
+        }), 410
+
+    revision = safe_revision()
+    changes = {'revision': revision}
+    for key, model in (('diseases', DiseaseCard), ('professional_centers', ProfessionalCenter)):
+        criteria = {'revision': {'$gt': since, '$lte': revision}} if since else {}
+        inserted, updated = [], []
+        for doc in model._get_collection().find(criteria).sort('revision'):
+            created = doc.get('created_revision')
+            (updated if since and created is not None and created <= since else inserted).append(public_document(doc))
+        deleted = [] if not since else [
+            tombstone['record_id'] for tombstone in Tombstone._get_collection().find(
+                {'collection': model._get_collection_name(), 'revision': {'$gt': since, '$lte': revision}},
+                {'record_id': 1},
+            ).sort('revision')
+        ]
+        changes[key] = {'inserted': inserted, 'updated': updated, 'deleted': deleted}
+    return jsonify(changes)
+
+
+@bp.route('/api/export', methods=['GET'])
+def export_catalogue():
+    """Stream one collection as csv, ndjson, arrow or parquet."""
+    fmt = request.args.get('format', 'ndjson')
+    kind = request.args.get('collection', 'diseases')
+    if fmt not in export.FORMATS:
+        return jsonify({"error": "format must be one of: " + ", ".join(export.FORMATS)}), 400
+    models = {'diseases': DiseaseCard, 'professional_centers': ProfessionalCenter}
+    if kind not in models:
+        return jsonify({"error": "collection must be one of: " + ", ".join(models)}), 400
+    if fmt in ('arrow', 'parquet') and not export.pyarrow_available():
+        return jsonify({"error": "%s export needs pyarrow installed" % fmt}), 501
+
+    mimetype, extension = export.FORMATS[fmt]
+    response = Response(
+        stream_with_context(export.export(models[kind]._get_collection(), kind, fmt)),
+        mimetype=mimetype,
+    )
+    response.headers['Content-Disposition'] = 'attachment; filename=%s.%s' % (kind, extension)
+    return response
+
+
+def load_seed_data(name):
+    with open(os.path.join(DATA_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+@bp.route('/api/seed_data', methods=['GET'])
+def seed_data():
+    try:
+        # Only records that differ from the stored ones (by name and content hash) are written
+        reports = [
+            import_records(DiseaseCard, 'diseases', load_seed_data('seed_diseases.json'), sync=True),
+            import_records(ProfessionalCenter, 'professional_centers', load_seed_data('seed_centers.json'), sync=True),
+        ]
+
+        if any(report.written or report.deleted for report in reports):
+            rebuild_related(DiseaseCard, RelatedDiseases)
+            publish_catalogue()
+        return jsonify({
+            "message": "Database seeded successfully!",
+            "imports": [report.to_dict() for report in reports],
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
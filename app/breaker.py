@@ -0,0 +1,254 @@
+"""Circuit breaker and stale-while-revalidate for Mongo-backed queries.
+
+Every guarded query runs on a small pool, coalesced per key, while the
+request waits at most QUERY_DEADLINE seconds for it. The pool never
+queues: with every thread busy a new query is refused and the request is
+answered as if the circuit were open. The last good result per key is
+kept, so when the query is late or fails the request is answered from it
+(with its age) and the query carries on in the background as the one
+refresh for that key.
+
+Database errors (PyMongoError) and queries still running at the deadline
+count against a circuit breaker, the latter as soon as the deadline
+passes. Any other exception is a bug, not an outage: it is logged and
+raised to the request. After BREAKER_FAILURES failures in a row the
+circuit opens and no query is sent for BREAKER_RESET seconds, not even
+one accepted just before it opened; requests get the last good result,
+or QueryUnavailable if there is none. Then one probe query is let
+through, and its outcome closes the circuit or opens it again. A caller
+that takes the probe but sends nothing hands it back with ``release``; a
+probe that never reports within BREAKER_RESET counts as failed.
+
+    QUERY_DEADLINE      seconds a request waits for a query (default 0.5)
+    QUERY_WORKERS       query threads per worker (default 8)
+    BREAKER_FAILURES    consecutive failures that open the circuit (default 5)
+    BREAKER_RESET       seconds the circuit stays open (default 10)
+    STALE_CACHE_SIZE    last good results kept (default 1000)
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+import logging
+import os
+import threading
+import time
+
+from pymongo.errors import PyMongoError
+
+from app.profiling import profiled
+from app.singleflight import SingleFlight
+
+log = logging.getLogger(__name__)
+
+QUERY_DEADLINE = float(os.getenv('QUERY_DEADLINE', '0.5'))
+
+
+class QueryUnavailable(Exception):
+    def __init__(self, retry_after):
+        super().__init__("Query unavailable, retry in %.1fs" % retry_after)
+        self.retry_after = retry_after
+
+
+class PoolFull(Exception):
+    pass
+
+
+class BoundedPool:
+    """A thread pool that refuses work instead of queueing it once every thread is busy."""
+
+    def __init__(self, workers, thread_name_prefix='query'):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix)
+        self.slots = threading.BoundedSemaphore(workers)
+        self.rejected = 0
+
+    def submit(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PoolFull()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda done: self.slots.release())
+        return future
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failures=None, reset_timeout=None):
+        self.threshold = failures if failures is not None else int(os.getenv('BREAKER_FAILURES', '5'))
+        self.reset_timeout = reset_timeout if reset_timeout is not None else float(os.getenv('BREAKER_RESET', '10'))
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = 0.0
+        self.opened = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Whether a query may be sent now; in half-open state only the one probe may."""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN and now - self.probe_at >= self.reset_timeout:
+                # The probe never reported back: take it as failed
+                self._open(now)
+                return False
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_at = now
+                return True
+            return False
+
+    def is_open(self):
+        """Whether queries are being refused; unlike ``allow`` this never takes the probe."""
+        with self.lock:
+            return self.state == self.OPEN
+
+    def release(self):
+        """Hand back a probe that was allowed but not sent, so the next caller gets it."""
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def retry_after(self):
+        with self.lock:
+            if self.state != self.OPEN:
+                return 1.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+                if self.state == self.CLOSED:
+                    log.warning("Circuit opened after %d failed or slow queries", self.failures)
+                self._open(time.monotonic())
+
+    def _open(self, now):
+        self.state = self.OPEN
+        self.opened_at = now
+        self.opened += 1
+
+    def stats(self):
+        with self.lock:
+            return {'state': self.state, 'consecutive_failures': self.failures, 'times_opened': self.opened}
+
+
+class GuardedQueries:
+    def __init__(self, singleflight=None, breaker=None, deadline=QUERY_DEADLINE, workers=None, cache_size=None):
+        self.singleflight = singleflight or SingleFlight()
+        self.breaker = breaker or CircuitBreaker()
+        self.deadline = deadline
+        self.pool = BoundedPool(workers or int(os.getenv('QUERY_WORKERS', '8')))
+        self.cache_size = cache_size or int(os.getenv('STALE_CACHE_SIZE', '1000'))
+        self.last_good = OrderedDict()  # key -> (result, monotonic time it was fetched)
+        self.late = set()  # keys whose running query has already counted as a failure
+        self.lock = threading.Lock()
+        self.fresh = 0
+        self.stale = 0
+        self.unavailable = 0
+
+    def _run(self, key, fn):
+        # The circuit may have opened while this waited for a thread
+        if self.breaker.is_open():
+            raise QueryUnavailable(self.breaker.retry_after())
+        start = time.monotonic()
+        try:
+            result = fn()
+        except PyMongoError as e:
+            log.warning("Query %r failed: %s", key, e)
+            self._finish(key)
+            self.breaker.failure()
+            raise
+        except Exception:
+            log.exception("Query %r failed", key)
+            self._finish(key)
+            raise
+        counted = self._finish(key)
+        if time.monotonic() - start <= self.deadline:
+            self.breaker.success()
+        elif not counted:
+            self.breaker.failure()
+        with self.lock:
+            self.last_good[key] = (result, time.monotonic())
+            self.last_good.move_to_end(key)
+            if len(self.last_good) > self.cache_size:
+                self.last_good.popitem(last=False)
+        return result
+
+    def _finish(self, key):
+        """Forget that ``key``'s query was late; returns whether it was."""
+        with self.lock:
+            late = key in self.late
+            self.late.discard(key)
+            return late
+
+    def _missed_deadline(self, key, future):
+        started = getattr(future, 'submitted_at', None)
+        if started is None or time.monotonic() - started < self.deadline:
+            return
+        with self.lock:
+            if future.done() or key in self.late:
+                return
+            self.late.add(key)
+        self.breaker.failure()
+
+    def submit(self, key, fn):
+        """Start (or join) the query for ``key``; None while the circuit is open or the pool is full."""
+        if not self.breaker.allow():
+            return None
+        try:
+            # A profiled request's query shows up in its profile even though it runs on the pool
+            future = self.singleflight.submit(self.pool, key, profiled(lambda: self._run(key, fn)))
+        except PoolFull:
+            self.breaker.release()
+            return None
+        if getattr(future, 'submitted_at', None) is None:
+            future.submitted_at = time.monotonic()
+        return future
+
+    def result(self, key, future, timeout=None):
+        """``(result, age)`` of a submitted query: ``age`` is None when fresh, else seconds.
+
+        Waits up to ``timeout`` seconds (default: the deadline) for ``future``,
+        then falls back to the last good result. A query still running past
+        the deadline counts against the breaker right away, not once it
+        returns.
+        """
+        if future is not None:
+            wait([future], self.deadline if timeout is None else max(0, timeout))
+            if not future.done():
+                self._missed_deadline(key, future)
+            elif future.exception() is None:
+                self.fresh += 1
+                return future.result(), None
+            elif not isinstance(future.exception(), (PyMongoError, QueryUnavailable)):
+                raise future.exception()
+        with self.lock:
+            cached = self.last_good.get(key)
+        if cached is None:
+            self.unavailable += 1
+            raise QueryUnavailable(self.breaker.retry_after())
+        self.stale += 1
+        return cached[0], time.monotonic() - cached[1]
+
+    def query(self, key, fn):
+        return self.result(key, self.submit(key, fn))
+
+    def stats(self):
+        return dict(
+            self.breaker.stats(),
+            fresh=self.fresh,
+            stale=self.stale,
+            unavailable=self.unavailable,
+            rejected=self.pool.rejected,
+            cached_keys=len(self.last_good),
+        )
@@ -0,0 +1,279 @@
+from app.folding import matches, query_tokens
+from app.hours import OpeningIndex
+
+
+class StringTable:
+    """Dictionary encoding for the strings repeated across catalogue records.
+
+    Every distinct string is stored once and records keep small integer codes
+    into the table instead of their own copy of the value.
+    """
+
+    __slots__ = ('codes', 'values')
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def decode(self, code):
+        return self.values[code]
+
+
+def bit_positions(bits):
+    """Positions of the set bits of ``bits``, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class Record:
+    # Field layout, in document order:
+    #   text_fields   - kept as plain strings (unique per record, e.g. name)
+    #   code_fields   - single repeated string, stored as one code
+    #   list_fields   - list of repeated strings, stored as a tuple of codes
+    #   dict_fields   - flat dict of strings, stored as (key, value) code pairs
+    #   raw_fields    - anything else, stored as decoded (e.g. lists of ints)
+    text_fields = ()
+    code_fields = ()
+    list_fields = ()
+    dict_fields = ()
+    raw_fields = ()
+    __slots__ = ('id',)
+
+    @classmethod
+    def from_document(cls, doc, table):
+        record = cls.__new__(cls)
+        record.id = str(doc['_id']) if '_id' in doc else doc['id']
+        for field in cls.text_fields:
+            setattr(record, field, doc.get(field))
+        for field in cls.code_fields:
+            value = doc.get(field)
+            setattr(record, field, None if value is None else table.encode(value))
+        for field in cls.list_fields:
+            value = doc.get(field)
+            setattr(record, field, None if value is None else tuple(table.encode(v) for v in value))
+        for field in cls.dict_fields:
+            value = doc.get(field)
+            if value is not None:
+                value = tuple((table.encode(k), table.encode(v)) for k, v in value.items())
+            setattr(record, field, value)
+        for field in cls.raw_fields:
+            setattr(record, field, doc.get(field))
+        return record
+
+    def to_dict(self, table):
+        values = table.values
+        result = {}
+        for field in self.text_fields:
+            value = getattr(self, field)
+            if value is not None:
+                result[field] = value
+        for field in self.code_fields:
+            code = getattr(self, field)
+            if code is not None:
+                result[field] = values[code]
+        for field in self.list_fields:
+            codes = getattr(self, field)
+            if codes is not None:
+                result[field] = [values[c] for c in codes]
+        for field in self.dict_fields:
+            pairs = getattr(self, field)
+            if pairs is not None:
+                result[field] = {values[k]: values[v] for k, v in pairs}
+        for field in self.raw_fields:
+            value = getattr(self, field)
+            if value is not None:
+                result[field] = value
+        result['id'] = self.id
+        return result
+
+
+class DiseaseRecord(Record):
+    text_fields = ('name',)
+    facet_fields = ('prevalance', 'causes', 'symptoms', 'treatments')
+    code_fields = ('prevalance',)
+    list_fields = ('symptoms', 'causes', 'treatments', 'resourses')
+    __slots__ = ('name', 'prevalance', 'symptoms', 'causes', 'treatments', 'resourses')
+
+
+class CenterRecord(Record):
+    text_fields = ('name', 'google_maps_embed')
+    code_fields = ('location', 'hours_of_operation', 'timezone')
+    list_fields = ('diseases',)
+    dict_fields = ('contact_info',)
+    raw_fields = ('opening_intervals',)
+    __slots__ = (
+        'name', 'google_maps_embed', 'location', 'hours_of_operation', 'timezone', 'diseases', 'contact_info',
+        'opening_intervals',
+    )
+
+
+class Catalogue:
+    """Compact, read-mostly in-memory copy of both collections.
+
+    All repeated values share a single StringTable, so a worker holds each
+    distinct prevalance, cause, URL, location, ... exactly once. Records keep
+    the order they were loaded in, which for a catalogue built from a
+    Snapshot is their position in the snapshot.
+
+    Disease facets are indexed as bitmaps: for every value of a facet field
+    a Python int whose bit ``i`` is set when ``diseases[i]`` has that value.
+    Filters and counts are then bitwise AND / popcount over a handful of ints.
+
+    ``apply`` patches single records in place: a changed record gets its own
+    encoded JSON in ``overrides`` and a deleted one is cleared from ``live``;
+    everything else keeps being served from the snapshot. Request threads
+    read while a watcher thread applies, so ``apply`` never mutates a dict a
+    reader may hold: it builds replacement ``overrides`` and facet indexes
+    and swaps them in, overrides before the ``live`` bit that exposes them.
+
+    Center opening hours are indexed per timezone by an OpeningIndex, built
+    on the first open-now query and again after centers change, from the
+    opening_intervals stored at write time. Served JSON does not carry them:
+    a snapshot keeps them in its meta, and ``apply`` gets them in ``doc``.
+    """
+
+    def __init__(self, disease_docs=(), center_docs=(), snapshot=None):
+        self.snapshot = snapshot
+        self.table = StringTable()
+        self.records = {
+            'diseases': [DiseaseRecord.from_document(doc, self.table) for doc in disease_docs],
+            'centers': [CenterRecord.from_document(doc, self.table) for doc in center_docs],
+        }
+        self.diseases = self.records['diseases']
+        self.centers = self.records['centers']
+        self.positions = {
+            kind: {record.id: position for position, record in enumerate(records)}
+            for kind, records in self.records.items()
+        }
+        self.live = {kind: (1 << len(records)) - 1 for kind, records in self.records.items()}
+        self.overrides = {kind: {} for kind in self.records}
+        self.facets = {field: {} for field in DiseaseRecord.facet_fields}
+        for position, record in enumerate(self.diseases):
+            self._index(self.facets, record, 1 << position)
+        self._opening = None
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        intervals = snapshot.meta.get('opening_intervals', {})
+        centers = (dict(doc, opening_intervals=intervals.get(doc['id'])) for doc in snapshot.records('centers'))
+        return cls(snapshot.records('diseases'), centers, snapshot=snapshot)
+
+    def _index(self, facets, record, bit, remove=False):
+        for field, index in facets.items():
+            codes = getattr(record, field)
+            if codes is None:
+                continue
+            for code in (codes,) if field in DiseaseRecord.code_fields else codes:
+                index[code] = index.get(code, 0) & ~bit if remove else index.get(code, 0) | bit
+
+    def apply(self, kind, record_id, doc, encoded):
+        """Insert, replace (``doc`` given) or delete (``doc`` is None) one record.
+
+        ``encoded`` is the record's JSON as it should appear in responses;
+        ``doc`` may carry more, e.g. a center's opening_intervals.
+        """
+        record_class = DiseaseRecord if kind == 'diseases' else CenterRecord
+        records = self.records[kind]
+        facets = {field: dict(index) for field, index in self.facets.items()} if kind == 'diseases' else None
+        if kind == 'centers':
+            self._opening = None
+        position = self.positions[kind].get(record_id)
+        if position is not None:
+            bit = 1 << position
+            if facets is not None and self.live[kind] & bit:
+                self._index(facets, records[position], bit, remove=True)
+            # A stale override left behind is unreachable until the bit is set again
+            self.live[kind] &= ~bit
+        if doc is None:
+            if facets is not None:
+                self.facets = facets
+            return
+        record = record_class.from_document(doc, self.table)
+        if position is None:
+            position = len(records)
+            records.append(record)
+            self.positions[kind][record_id] = position
+        else:
+            records[position] = record
+        bit = 1 << position
+        self.overrides[kind] = {**self.overrides[kind], position: encoded}
+        if facets is not None:
+            self._index(facets, record, bit)
+            self.facets = facets
+        self.live[kind] |= bit
+
+    def is_live(self, kind, record_id):
+        position = self.positions[kind].get(record_id)
+        return position is not None and bool(self.live[kind] >> position & 1)
+
+    def json_array(self, kind, bits=None):
+        """JSON array body for the live records of ``kind`` (or those in ``bits``)."""
+        # live before overrides: every live bit read has its override in place already
+        live = self.live[kind]
+        overrides = self.overrides[kind]
+        if bits is None and not overrides and live == (1 << self.snapshot.count(kind)) - 1:
+            return self.snapshot.json_array(kind)
+        bits = live if bits is None else bits & live
+        return b'[' + b','.join(
+            overrides[p] if p in overrides else self.snapshot.record(kind, p)
+            for p in bit_positions(bits)
+        ) + b']'
+
+    def select_diseases(self, filters, name=None):
+        """Bitmap of the diseases matching ``filters``.
+
+        ``filters`` maps a facet field to the accepted values: values of one
+        field are ORed, fields are ANDed. ``name`` keeps only diseases whose
+        name matches it as a search query (see app.folding).
+        """
+        bits = self.live['diseases']
+        for field, values in filters.items():
+            index = self.facets[field]
+            accepted = 0
+            for value in values:
+                code = self.table.codes.get(value)
+                if code is not None:
+                    accepted |= index.get(code, 0)
+            bits &= accepted
+        tokens = query_tokens(name) if name else None
+        if tokens:
+            for position in bit_positions(bits):
+                if not matches(tokens, self.diseases[position].name):
+                    bits &= ~(1 << position)
+        return bits
+
+    def open_centers(self, instant):
+        """Bitmap of the live centers open at the aware datetime ``instant``."""
+        opening = self._opening
+        if opening is None:
+            values = self.table.values
+            opening = self._opening = OpeningIndex(
+                (None if record.timezone is None else values[record.timezone], record.opening_intervals)
+                for record in self.centers
+            )
+        return opening.open_at(instant) & self.live['centers']
+
+    def facet_counts(self, bits):
+        values = self.table.values
+        counts = {}
+        for field, index in self.facets.items():
+            field_counts = {}
+            for code, value_bits in index.items():
+                count = (value_bits & bits).bit_count()
+                if count:
+                    field_counts[values[code]] = count
+            counts[field] = dict(sorted(field_counts.items(), key=lambda item: (-item[1], item[0])))
+        return counts
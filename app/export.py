@@ -0,0 +1,203 @@
+"""Streaming bulk export of a catalogue collection.
+
+Documents are read from the Mongo cursor ``EXPORT_BATCH`` at a time and each
+batch is encoded and handed to the client before the next one is fetched, so
+memory stays flat however large the collection is.
+
+CSV and NDJSON need nothing beyond the standard library. Arrow (IPC stream)
+and Parquet need pyarrow, which is only imported for those formats; list
+fields become native ``list<string>`` columns and prevalance/location are
+dictionary-encoded, so pandas reads them without any JSON parsing.
+"""
+import csv
+import datetime
+import io
+import json
+
+EXPORT_BATCH = 1000
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Column name -> kind: 'string', 'category' (repeated string), 'list', 'map', 'int', 'timestamp'
+COLUMNS = {
+    'diseases': {
+        'id': 'string',
+        'name': 'string',
+        'symptoms': 'list',
+        'causes': 'list',
+        'treatments': 'list',
+        'prevalance': 'category',
+        'resourses': 'list',
+        'revision': 'int',
+        'updated_at': 'timestamp',
+    },
+    'professional_centers': {
+        'id': 'string',
+        'name': 'string',
+        'location': 'category',
+        'google_maps_embed': 'string',
+        'diseases': 'list',
+        'contact_info': 'map',
+        'hours_of_operation': 'category',
+        'timezone': 'category',
+        'revision': 'int',
+        'updated_at': 'timestamp',
+    },
+}
+
+
+def batches(collection, columns):
+    projection = {name: 1 for name in columns if name != 'id'}
+    batch = []
+    for doc in collection.find({}, projection).batch_size(EXPORT_BATCH):
+        doc['id'] = str(doc.pop('_id'))
+        batch.append(doc)
+        if len(batch) == EXPORT_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _json_default(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat() + 'Z'
+    return str(value)
+
+
+def export_ndjson(docs_batches, columns):
+    for batch in docs_batches:
+        yield ''.join(
+            json.dumps({name: doc.get(name) for name in columns}, default=_json_default) + '\n'
+            for doc in batch
+        ).encode('utf-8')
+
+
+def export_csv(docs_batches, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(list(columns))
+    for batch in docs_batches:
+        for doc in batch:
+            row = []
+            for name, kind in columns.items():
+                value = doc.get(name)
+                if value is None:
+                    row.append('')
+                elif kind in ('list', 'map'):
+                    # Lists and dicts stay lossless as JSON inside the cell
+                    row.append(json.dumps(value))
+                elif kind == 'timestamp':
+                    row.append(_json_default(value))
+                else:
+                    row.append(value)
+            writer.writerow(row)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def arrow_schema(pa, columns):
+    types = {
+        'string': pa.string(),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+        'list': pa.list_(pa.string()),
+        'map': pa.map_(pa.string(), pa.string()),
+        'int': pa.int64(),
+        'timestamp': pa.timestamp('ms', tz='UTC'),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns.items()])
+
+
+def record_batch(pa, schema, batch):
+    arrays = []
+    for field in schema:
+        values = [doc.get(field.name) for doc in batch]
+        if pa.types.is_map(field.type):
+            values = [None if v is None else list(v.items()) for v in values]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """Write-only file object that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def export_arrow(docs_batches, columns):
+    import pyarrow as pa
+
+    schema = arrow_schema(pa, columns)
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in docs_batches:
+            writer.write_batch(record_batch(pa, schema, batch))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_parquet(docs_batches, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(pa, columns)
+    sink = _ChunkSink()
+    # One row group per Mongo batch, so each batch can be sent as soon as it is encoded
+    with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+        for batch in docs_batches:
+            writer.write_batch(record_batch(pa, schema, batch))
+            yield sink.drain()
+    yield sink.drain()
+
+
+WRITERS = {
+    'csv': export_csv,
+    'ndjson': export_ndjson,
+    'arrow': export_arrow,
+    'parquet': export_parquet,
+}
+
+
+def pyarrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export(collection, kind, fmt):
+    columns = COLUMNS[kind]
+    return WRITERS[fmt](batches(collection, columns), columns)
@@ -0,0 +1,69 @@
+"""Search folding: accent-, case- and punctuation-insensitive matching keys.
+
+``fold`` decomposes text (NFKD), drops the combining marks, casefolds, deletes
+apostrophes and turns other punctuation and symbols into spaces, so
+"Sjögren’s Syndrome", "sjogren's syndrome" and "SJOGRENS SYNDROME" all fold
+to "sjogrens syndrome".
+
+At write time every searchable field is folded into tokens and each token
+into its prefixes, stored on the document as ``search_prefixes`` (a
+multikey index). A query matches when every one of its folded tokens is
+the start of some word of the record, i.e. when the prefixes array
+contains all query tokens: an ``$all`` of exact values on an indexed
+array, with no regex anywhere.
+"""
+import unicodedata
+
+# Longest prefix stored per word; longer query words are cut to match
+MAX_PREFIX = 24
+APOSTROPHES = "'`´‘’ʹʻʼʽ"
+
+
+def fold(text):
+    chars = []
+    for ch in unicodedata.normalize('NFKD', text or ''):
+        category = unicodedata.category(ch)
+        if category == 'Mn':
+            continue
+        if ch in APOSTROPHES:
+            continue
+        chars.append(' ' if category[0] in 'PS' else ch)
+    return ' '.join(''.join(chars).casefold().split())
+
+
+def name_key(name):
+    """What record names are unique on: case-insensitive, otherwise as written."""
+    return name.casefold()
+
+
+def query_tokens(text):
+    """Distinct folded words of a search query, each cut to MAX_PREFIX, in order."""
+    return list(dict.fromkeys(word[:MAX_PREFIX] for word in fold(text).split()))
+
+
+def search_prefixes(*values):
+    """Sorted prefixes of every folded word of ``values`` (strings or lists of strings)."""
+    prefixes = set()
+    for value in values:
+        for text in [value] if isinstance(value, str) else value or ():
+            for word in fold(text).split():
+                prefixes.update(word[:i] for i in range(1, min(len(word), MAX_PREFIX) + 1))
+    return sorted(prefixes)
+
+
+def matches(tokens, *values):
+    """True when every query token starts a folded word of ``values``."""
+    words = [word for value in values for text in ([value] if isinstance(value, str) else value or ())
+             for word in fold(text).split()]
+    return all(any(word.startswith(token) for word in words) for token in tokens)
+
+
+def name_score(tokens, name):
+    """How well a result's name answers the query: 3 exact, 2 prefix, 1 all words, 0 otherwise."""
+    folded = fold(name)
+    query = ' '.join(tokens)
+    if folded == query:
+        return 3
+    if folded.startswith(query):
+        return 2
+    return 1 if matches(tokens, name) else 0
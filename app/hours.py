@@ -0,0 +1,134 @@
+"""Structured opening hours for professional centers.
+
+``hours_of_operation`` stays free text for display; at write time it is
+parsed into weekly intervals of local minute-of-week (Monday 00:00 is 0, a
+week is 10080 minutes), which together with the center's IANA timezone
+answers "is it open at instant t" without any text handling at query time.
+A center open "24/7" is open at every instant, timezone or not; other hours
+without a timezone cannot be placed in time and never match.
+
+Understood forms: "24/7", "9am - 5pm Mon-Fri", "Mon-Fri 9am-5pm",
+"9:30am - 5pm Mon, Wed, Fri", "10pm - 6am Sat-Sun" (wraps past midnight).
+Several rules can be joined with ";".
+"""
+from bisect import bisect_right
+import datetime
+import re
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+WEEK = 7 * 24 * 60
+DAYS = {'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6}
+
+_TIME = r'(\d{1,2})(?::(\d{2}))?\s*(am|pm)'
+_TIME_RANGE = re.compile(_TIME + r'\s*[-–]\s*' + _TIME, re.IGNORECASE)
+_DAY = r'(mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?'
+_DAY_RANGE = re.compile(_DAY + r'(?:\s*[-–]\s*' + _DAY + r')?', re.IGNORECASE)
+
+
+def _minutes(hour, minute, meridiem):
+    hour = int(hour) % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    return hour * 60 + int(minute or 0)
+
+
+def _days(text):
+    days = []
+    for match in _DAY_RANGE.finditer(text):
+        first = DAYS[match.group(1).lower()[:3]]
+        last = DAYS[match.group(2).lower()[:3]] if match.group(2) else first
+        day = first
+        while True:
+            days.append(day)
+            if day == last:
+                break
+            day = (day + 1) % 7
+    return days
+
+
+def parse_hours(text):
+    """Sorted, merged ``[start, end)`` minute-of-week intervals, or None if unparseable."""
+    if not text:
+        return None
+    text = text.strip()
+    if text.replace(' ', '') == '24/7':
+        return [[0, WEEK]]
+
+    intervals = []
+    for rule in text.split(';'):
+        times = _TIME_RANGE.search(rule)
+        if times is None:
+            return None
+        days = _days(rule[:times.start()] + ' ' + rule[times.end():])
+        if not days:
+            return None
+        start = _minutes(*times.group(1, 2, 3))
+        end = _minutes(*times.group(4, 5, 6))
+        length = (end - start) % (24 * 60) or 24 * 60
+        for day in days:
+            begin = day * 24 * 60 + start
+            if begin + length <= WEEK:
+                intervals.append([begin, begin + length])
+            else:
+                # Sunday night into Monday morning
+                intervals.append([begin, WEEK])
+                intervals.append([0, begin + length - WEEK])
+
+    intervals.sort()
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def valid_timezone(name):
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def minute_of_week(instant, timezone):
+    local = instant.astimezone(ZoneInfo(timezone))
+    return local.weekday() * 24 * 60 + local.hour * 60 + local.minute
+
+
+class OpeningIndex:
+    """Which centers are open at an instant, in O(timezones * log(boundaries)).
+
+    Per timezone, all interval boundaries are sorted once; each elementary
+    segment between two boundaries carries the bitset (Python int, bit i is
+    center position i) of centers open throughout it. A lookup converts the
+    instant to local minute-of-week, bisects, and ORs the bitsets across
+    timezones.
+    """
+
+    def __init__(self, centers):
+        self.always = 0
+        by_zone = {}
+        for position, (timezone, intervals) in enumerate(centers):
+            if intervals == [[0, WEEK]]:
+                self.always |= 1 << position
+            elif timezone and intervals:
+                by_zone.setdefault(timezone, []).append((position, intervals))
+
+        self.zones = {}
+        for timezone, members in by_zone.items():
+            boundaries = sorted({0, WEEK} | {b for _, intervals in members for interval in intervals for b in interval})
+            segments = [0] * len(boundaries)
+            for position, intervals in members:
+                bit = 1 << position
+                for start, end in intervals:
+                    for i in range(bisect_right(boundaries, start) - 1, bisect_right(boundaries, end - 1)):
+                        segments[i] |= bit
+            self.zones[timezone] = (boundaries, segments)
+
+    def open_at(self, instant):
+        if instant.tzinfo is None:
+            instant = instant.replace(tzinfo=datetime.timezone.utc)
+        bits = self.always
+        for timezone, (boundaries, segments) in self.zones.items():
+            bits |= segments[bisect_right(boundaries, minute_of_week(instant, timezone)) - 1]
+        return bits
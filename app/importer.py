@@ -0,0 +1,329 @@
+"""Catalogue import pipeline: parallel validation/normalisation, then batched writes.
+
+Records are validated and normalised in chunks across a process pool (URL
+checks, whitespace and case clean-up, required fields), deduplicated by
+name, and handed to the writer in batches. A bad record never aborts the
+import: it is collected, with its reasons, into the ImportReport.
+
+    flask --app 'app:create_app()' import-catalogue diseases cards.json --workers 8
+    flask --app 'app:create_app()' import-catalogue diseases cards.json --sync
+
+Records stored before search keys or opening intervals existed get theirs
+from ``backfill-search-keys``.
+"""
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+import re
+import time
+
+import click
+from mongoengine import URLField, ValidationError
+from pymongo import UpdateOne
+
+from app.folding import name_key, search_prefixes
+from app.hours import parse_hours, valid_timezone
+
+# Below this many records a process pool costs more than it saves
+PARALLEL_THRESHOLD = 2000
+CHUNK_SIZE = 500
+WRITE_BATCH = 1000
+
+_WHITESPACE = re.compile(r'\s+')
+_url_field = URLField()
+
+# Field specs per collection: (required text, optional text, text lists, url fields, url lists,
+# fields folded into search_prefixes)
+SCHEMAS = {
+    'diseases': {
+        'required': ('name',),
+        'text': ('prevalance',),
+        'lists': ('symptoms', 'causes', 'treatments'),
+        'urls': (),
+        'url_lists': ('resourses',),
+        'search': ('name',),
+    },
+    'professional_centers': {
+        'required': ('name', 'location'),
+        'text': ('hours_of_operation', 'timezone'),
+        'lists': ('diseases',),
+        'urls': ('google_maps_embed',),
+        'url_lists': (),
+        'search': ('name', 'location', 'diseases'),
+    },
+}
+
+
+def clean_text(value):
+    return _WHITESPACE.sub(' ', value).strip() if isinstance(value, str) else value
+
+
+def clean_list(values):
+    seen = set()
+    cleaned = []
+    for value in values or ():
+        value = clean_text(value)
+        if value and value.casefold() not in seen:
+            seen.add(value.casefold())
+            cleaned.append(value)
+    return cleaned
+
+
+def check_url(value, errors, name):
+    try:
+        _url_field.validate(value)
+    except ValidationError:
+        errors.append('%s: invalid URL %r' % (name, value))
+        return False
+    return True
+
+
+def normalize_record(kind, record):
+    """Return ``(normalized, errors)``; ``normalized`` is None when errors is non-empty."""
+    schema = SCHEMAS[kind]
+    errors = []
+    if not isinstance(record, dict):
+        return None, ['record is not an object']
+    out = {}
+    for name in schema['required']:
+        value = clean_text(record.get(name))
+        if not value or not isinstance(value, str):
+            errors.append('%s: required' % name)
+        out[name] = value
+    for name in schema['text']:
+        value = clean_text(record.get(name))
+        if value:
+            out[name] = value
+    for name in schema['lists']:
+        out[name] = clean_list(record.get(name))
+    for name in schema['urls']:
+        value = clean_text(record.get(name))
+        if not value:
+            errors.append('%s: required' % name)
+        elif check_url(value, errors, name):
+            out[name] = value
+    for name in schema['url_lists']:
+        out[name] = [url for url in clean_list(record.get(name)) if check_url(url, errors, name)]
+
+    if kind == 'diseases' and out.get('prevalance'):
+        # "very RARE" -> "Very rare", so facets don't split on case
+        out['prevalance'] = out['prevalance'][:1].upper() + out['prevalance'][1:].lower()
+    if kind == 'professional_centers':
+        contact_info = record.get('contact_info') or {}
+        if not isinstance(contact_info, dict):
+            errors.append('contact_info: must be an object')
+        else:
+            out['contact_info'] = {k: clean_text(v) for k, v in contact_info.items() if clean_text(v)}
+            if out['contact_info'].get('email'):
+                out['contact_info']['email'] = out['contact_info']['email'].lower()
+            if out['contact_info'].get('website'):
+                check_url(out['contact_info']['website'], errors, 'contact_info.website')
+        if out.get('timezone') and not valid_timezone(out['timezone']):
+            errors.append('timezone: unknown timezone %r' % out['timezone'])
+        # Hours that don't parse are kept for display; the center just never matches open_now
+        out['opening_intervals'] = parse_hours(out.get('hours_of_operation')) or []
+    if errors:
+        return None, errors
+    out['search_prefixes'] = search_prefixes(*(out.get(name) for name in schema['search']))
+    return out, []
+
+
+def editable_fields(kind):
+    """The fields a client supplies for ``kind``; everything else is derived."""
+    schema = SCHEMAS[kind]
+    fields = schema['required'] + schema['text'] + schema['lists'] + schema['urls'] + schema['url_lists']
+    return fields + ('contact_info',) if kind == 'professional_centers' else fields
+
+
+def content_hash(record):
+    canonical = json.dumps(record, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def _normalize_chunk(args):
+    kind, start, records = args
+    results = []
+    for i, record in enumerate(records):
+        normalized, errors = normalize_record(kind, record)
+        if normalized is not None:
+            normalized['content_hash'] = content_hash(normalized)
+        results.append((start + i, normalized, errors))
+    return results
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    received: int = 0
+    written: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    rejected: list = field(default_factory=list)
+    validate_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+    def reject(self, index, record, errors):
+        name = record.get('name') if isinstance(record, dict) else None
+        self.rejected.append({'index': index, 'name': name, 'errors': errors})
+
+    def to_dict(self):
+        return {
+            'collection': self.kind,
+            'received': self.received,
+            'written': self.written,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'deleted': self.deleted,
+            'unchanged': self.unchanged,
+            'rejected_count': len(self.rejected),
+            'rejected': self.rejected,
+            'validate_seconds': round(self.validate_seconds, 3),
+            'write_seconds': round(self.write_seconds, 3),
+        }
+
+
+def validate_records(kind, records, workers=None, report=None):
+    """Normalise ``records`` in parallel; returns ``(valid, report)``.
+
+    ``valid`` keeps input order, minus rejects and later duplicates of a name.
+    """
+    records = list(records)
+    report = report or ImportReport(kind)
+    report.received = len(records)
+    start = time.perf_counter()
+
+    chunks = [(kind, i, records[i:i + CHUNK_SIZE]) for i in range(0, len(records), CHUNK_SIZE)]
+    workers = workers or os.cpu_count() or 1
+    if len(records) < PARALLEL_THRESHOLD or workers == 1:
+        results = map(_normalize_chunk, chunks)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_normalize_chunk, chunks))
+
+    valid = []
+    seen_names = set()
+    for chunk in results:
+        for index, normalized, errors in chunk:
+            if errors:
+                report.reject(index, records[index], errors)
+                continue
+            key = name_key(normalized['name'])
+            if key in seen_names:
+                report.reject(index, records[index], ['name: duplicate of an earlier record'])
+                continue
+            seen_names.add(key)
+            valid.append(normalized)
+    report.validate_seconds = time.perf_counter() - start
+    return valid, report
+
+
+def write_records(model, valid, report):
+    start = time.perf_counter()
+    for i in range(0, len(valid), WRITE_BATCH):
+        report.written += len(model.insert_batch(valid[i:i + WRITE_BATCH]))
+    report.inserted = report.written
+    report.write_seconds = time.perf_counter() - start
+    return report
+
+
+def sync_records(model, valid, report):
+    start = time.perf_counter()
+    report.inserted, report.updated, report.deleted, report.unchanged = model.sync_batch(valid)
+    report.written = report.inserted + report.updated
+    report.write_seconds = time.perf_counter() - start
+    return report
+
+
+def import_records(model, kind, records, workers=None, sync=False):
+    """Validate ``records`` and write them.
+
+    With ``sync`` the collection is diffed against them by name and content
+    hash, so only new, changed and removed records are written; otherwise
+    every valid record is appended.
+    """
+    valid, report = validate_records(kind, records, workers=workers)
+    return (sync_records if sync else write_records)(model, valid, report)
+
+
+def read_records(path):
+    """Records from a JSON array file or an NDJSON file."""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+@click.command('import-catalogue')
+@click.argument('kind', type=click.Choice(sorted(SCHEMAS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', type=int, default=None, help='Validation processes (default: CPU count).')
+@click.option('--replace', is_flag=True, help='Delete the existing collection first.')
+@click.option('--sync', is_flag=True, help='Write only the differences; delete records missing from PATH.')
+def import_command(kind, path, workers, replace, sync):
+    """Validate and import KIND records from the JSON/NDJSON file PATH."""
+    from app import connect_database
+    from app.api import publish_catalogue
+    from app.models import DiseaseCard, ProfessionalCenter, RelatedDiseases
+    from app.related import rebuild_related
+
+    connect_database()
+    model = DiseaseCard if kind == 'diseases' else ProfessionalCenter
+    if replace:
+        model.delete_all()
+    report = import_records(model, kind, read_records(path), workers=workers, sync=sync)
+    if kind == 'diseases' and (replace or report.written or report.deleted):
+        rebuild_related(DiseaseCard, RelatedDiseases)
+    publish_catalogue()
+    click.echo(json.dumps(report.to_dict(), indent=2))
+
+
+def backfill_search_prefixes(model):
+    """Compute ``search_prefixes`` for stored records that have none; returns how many were set."""
+    collection = model._get_collection()
+    fields = model.search_fields
+    updated = 0
+    operations = []
+    for doc in collection.find({'search_prefixes': {'$in': [None, []]}}, {field: 1 for field in fields}):
+        prefixes = search_prefixes(*(doc.get(field) for field in fields))
+        if prefixes:
+            operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {'search_prefixes': prefixes}}))
+        if len(operations) == WRITE_BATCH:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += collection.bulk_write(operations, ordered=False).modified_count
+    return updated
+
+
+def backfill_opening_intervals(model):
+    """Parse ``opening_intervals`` for stored centers that have none; returns how many were set."""
+    collection = model._get_collection()
+    updated = 0
+    operations = []
+    for doc in collection.find({'opening_intervals': {'$exists': False}}, {'hours_of_operation': 1}):
+        intervals = parse_hours(doc.get('hours_of_operation')) or []
+        operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {'opening_intervals': intervals}}))
+        if len(operations) == WRITE_BATCH:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += collection.bulk_write(operations, ordered=False).modified_count
+    return updated
+
+
+@click.command('backfill-search-keys')
+def backfill_command():
+    """Add search keys and opening intervals to records stored before they existed."""
+    from app import connect_database
+    from app.models import DiseaseCard, ProfessionalCenter
+
+    connect_database()
+    for kind, model in (('diseases', DiseaseCard), ('professional_centers', ProfessionalCenter)):
+        click.echo('%s: %d records updated' % (kind, backfill_search_prefixes(model)))
+    click.echo('opening hours: %d centers updated' % backfill_opening_intervals(ProfessionalCenter))
@@ -0,0 +1,325 @@
+from mongoengine import *
+from mongoengine.connection import get_db
+from app.folding import name_key, search_prefixes
+from app.hours import parse_hours
+from pymongo import InsertOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure
+from contextlib import contextmanager
+import datetime
+import os
+
+# A lease older than this belongs to a writer that died; it no longer holds back safe_revision()
+REVISION_LEASE_SECONDS = float(os.getenv('REVISION_LEASE_SECONDS', '300'))
+# Deletions are kept this long for /api/changes; a client that last synced before that must resync
+TOMBSTONE_RETENTION_DAYS = float(os.getenv('TOMBSTONE_RETENTION_DAYS', '30'))
+
+_leases_indexed = False
+
+
+def next_revision(count=1):
+    """Reserve ``count`` revisions from the shared counter; returns the last one."""
+    counter = get_db()['counters'].find_one_and_update(
+        {'_id': 'catalogue_revision'},
+        {'$inc': {'value': count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return counter['value']
+
+
+def current_revision():
+    counter = get_db()['counters'].find_one({'_id': 'catalogue_revision'})
+    return counter['value'] if counter else 0
+
+
+def tombstone_horizon():
+    """The newest revision whose tombstone has been pruned; 0 while none has."""
+    counter = get_db()['counters'].find_one({'_id': 'tombstone_horizon'})
+    return counter['value'] if counter else 0
+
+
+def revision_leases():
+    """The lease collection, with the TTL index that lets Mongo drop expired leases."""
+    global _leases_indexed
+    leases = get_db()['revision_leases']
+    if not _leases_indexed:
+        try:
+            leases.create_index('at', expireAfterSeconds=int(REVISION_LEASE_SECONDS))
+        except OperationFailure:
+            # Built with another REVISION_LEASE_SECONDS; change it in place
+            get_db().command('collMod', leases.name, index={
+                'keyPattern': {'at': 1}, 'expireAfterSeconds': int(REVISION_LEASE_SECONDS),
+            })
+        _leases_indexed = True
+    return leases
+
+
+@contextmanager
+def reserve_revisions(count=1):
+    """Reserve ``count`` revisions for a write done inside the block; yields the last one.
+
+    Revisions are reserved before the write lands, so a reader could see
+    the counter past a record that isn't there yet. A lease holding the
+    counter value from before the reservation is stored for the duration
+    of the block, and safe_revision() never reports beyond it.
+    """
+    leases = revision_leases()
+    lease = leases.insert_one({'floor': current_revision(), 'at': datetime.datetime.utcnow()}).inserted_id
+    try:
+        yield next_revision(count)
+    finally:
+        leases.delete_one({'_id': lease})
+
+
+def safe_revision():
+    """The highest revision whose writes, and all earlier ones, have landed."""
+    # Counter first: a reservation it already includes has its lease stored by now
+    revision = current_revision()
+    # The TTL monitor only runs once a minute; until it does, skip what it will delete
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=REVISION_LEASE_SECONDS)
+    for lease in revision_leases().find({'at': {'$gt': cutoff}}, {'floor': 1}).sort('floor', 1).limit(1):
+        revision = min(revision, lease['floor'])
+    return revision
+
+
+class RevisionedDocument(Document):
+    # Every write stamps the document with a new catalogue-wide revision so
+    # clients can ask for what changed since the revision they last saw.
+    created_revision = IntField()
+    revision = IntField()
+    updated_at = DateTimeField()
+    # Hash of the record's own fields, set by the importer; lets a re-import
+    # find changed records by comparing hashes per name (the natural key)
+    content_hash = StringField()
+    # Folded word prefixes of the search_fields (see app.folding), matched with $all
+    search_prefixes = ListField(StringField())
+    # app.folding.name_key(name); unique, so no two records differ only in case
+    name_key = StringField()
+
+    search_fields = ()
+
+    # Built by prepare_collection(), once duplicates stored before the unique
+    # index existed are gone; creating it on first use would fail on them
+    meta = {
+        'abstract': True,
+        'auto_create_index': False,
+        'indexes': ['revision', 'name', {'fields': ['name_key'], 'unique': True}, 'search_prefixes'],
+    }
+
+    def clean(self):
+        self.name_key = name_key(self.name)
+        self.search_prefixes = search_prefixes(*(getattr(self, field) for field in self.search_fields))
+
+    @classmethod
+    def document(cls, record):
+        """The Mongo document for a validated field dict, with its name key."""
+        doc = cls(**record).to_mongo().to_dict()
+        doc['name_key'] = name_key(doc['name'])
+        return doc
+
+    @classmethod
+    def prepare_collection(cls):
+        """Give every stored record a name key, delete duplicate names, then build the indexes.
+
+        Runs once per process, before the first write; returns the number of
+        duplicates deleted.
+        """
+        if cls.__dict__.get('_prepared'):
+            return 0
+        collection = cls._get_collection()
+        missing = [
+            UpdateOne({'_id': doc['_id']}, {'$set': {'name_key': name_key(doc['name'])}})
+            for doc in collection.find({'name_key': {'$exists': False}}, {'name': 1})
+        ]
+        if missing:
+            collection.bulk_write(missing, ordered=False)
+        _, duplicates = cls._by_name_key(collection.find({}, {'name': 1, 'name_key': 1}))
+        if duplicates:
+            Tombstone.record(cls, duplicates)
+            collection.delete_many({'_id': {'$in': duplicates}})
+        cls.ensure_indexes()
+        cls._prepared = True
+        return len(duplicates)
+
+    @staticmethod
+    def _by_name_key(docs):
+        """``({name key: doc}, [ids of later copies])``; the oldest copy of a name is kept."""
+        kept = {}
+        duplicates = []
+        for doc in sorted(docs, key=lambda doc: doc['_id']):
+            key = doc.get('name_key') or name_key(doc['name'])
+            if key in kept:
+                duplicates.append(doc['_id'])
+            else:
+                kept[key] = doc
+        return kept, duplicates
+
+    def save(self, *args, **kwargs):
+        with reserve_revisions() as revision:
+            self.revision = revision
+            if self.created_revision is None:
+                self.created_revision = self.revision
+            self.updated_at = datetime.datetime.utcnow()
+            return super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        Tombstone.record(type(self), [self.pk])
+        return super().delete(*args, **kwargs)
+
+    @classmethod
+    def insert_batch(cls, records):
+        """Insert already-validated field dicts with one insert_many.
+
+        Revisions are reserved as one block instead of one counter update
+        per document.
+        """
+        if not records:
+            return []
+        cls.prepare_collection()
+        with reserve_revisions(len(records)) as last:
+            now = datetime.datetime.utcnow()
+            docs = []
+            for i, record in enumerate(records):
+                doc = cls.document(record)
+                doc['revision'] = doc['created_revision'] = last - len(records) + 1 + i
+                doc['updated_at'] = now
+                docs.append(doc)
+            return cls._get_collection().insert_many(docs).inserted_ids
+
+    @classmethod
+    def sync_batch(cls, records):
+        """Make the collection hold exactly ``records``, touching only what differs.
+
+        ``records`` are validated field dicts carrying a ``content_hash``,
+        keyed by name key (app.folding.name_key). One projection query
+        reads the stored hashes; names no longer present (and extra copies
+        of a name) are deleted, then new names inserted and changed hashes
+        replaced in one unordered bulk write. Returns ``(inserted, updated, deleted,
+        unchanged)`` counts.
+        """
+        cls.prepare_collection()
+        collection = cls._get_collection()
+        stored, removed = cls._by_name_key(
+            collection.find({}, {'name': 1, 'name_key': 1, 'content_hash': 1, 'created_revision': 1})
+        )
+        incoming = {name_key(record['name']) for record in records}
+        changed = [
+            r for r in records
+            if stored.get(name_key(r['name']), {}).get('content_hash') != r['content_hash']
+        ]
+        removed.extend(doc['_id'] for key, doc in stored.items() if key not in incoming)
+
+        if not changed and not removed:
+            return 0, 0, 0, len(records)
+        operations = []
+        inserted = updated = 0
+        # One lease spans the reservation and the bulk write landing
+        with reserve_revisions(len(changed)) as last:
+            now = datetime.datetime.utcnow()
+            for i, record in enumerate(changed):
+                doc = cls.document(record)
+                doc['revision'] = last - len(changed) + 1 + i
+                doc['updated_at'] = now
+                previous = stored.get(name_key(record['name']))
+                if previous is None:
+                    doc['created_revision'] = doc['revision']
+                    operations.append(InsertOne(doc))
+                    inserted += 1
+                else:
+                    doc['_id'] = previous['_id']
+                    doc['created_revision'] = previous.get('created_revision', doc['revision'])
+                    operations.append(ReplaceOne({'_id': previous['_id']}, doc))
+                    updated += 1
+            if removed:
+                # Before the rest, so a kept record may take the name key of a removed one
+                Tombstone.record(cls, removed)
+                collection.delete_many({'_id': {'$in': removed}})
+            if operations:
+                collection.bulk_write(operations, ordered=False)
+        return inserted, updated, len(removed), len(records) - len(changed)
+
+    @classmethod
+    def delete_all(cls):
+        Tombstone.record(cls, cls.objects.scalar('id'))
+        cls.objects.delete()
+
+
+class Tombstone(Document):
+    collection = StringField(required=True)
+    record_id = StringField(required=True)
+    revision = IntField(required=True)
+    deleted_at = DateTimeField(required=True)
+
+    meta = {'indexes': [('collection', 'revision'), 'deleted_at']}
+
+    @classmethod
+    def record(cls, model, ids):
+        ids = [str(i) for i in ids]
+        if not ids:
+            return
+        with reserve_revisions(len(ids)) as last:
+            now = datetime.datetime.utcnow()
+            cls._get_collection().insert_many([
+                {
+                    'collection': model._get_collection_name(),
+                    'record_id': record_id,
+                    'revision': last - len(ids) + 1 + i,
+                    'deleted_at': now,
+                }
+                for i, record_id in enumerate(ids)
+            ])
+        cls.prune(now)
+
+    @classmethod
+    def prune(cls, now):
+        """Delete tombstones past TOMBSTONE_RETENTION_DAYS, raising the horizon to the newest one first."""
+        collection = cls._get_collection()
+        cutoff = now - datetime.timedelta(days=TOMBSTONE_RETENTION_DAYS)
+        for newest in collection.find({'deleted_at': {'$lt': cutoff}}, {'revision': 1}).sort('revision', -1).limit(1):
+            get_db()['counters'].update_one(
+                {'_id': 'tombstone_horizon'}, {'$max': {'value': newest['revision']}}, upsert=True,
+            )
+            collection.delete_many({'revision': {'$lte': newest['revision']}})
+
+
+def prepare_collections():
+    for model in (DiseaseCard, ProfessionalCenter):
+        model.prepare_collection()
+
+
+class DiseaseCard(RevisionedDocument):
+    name = StringField(required=True)
+    symptoms = ListField(StringField())
+    causes = ListField(StringField())
+    treatments = ListField(StringField())
+    prevalance = StringField()
+    resourses = ListField(URLField())
+
+    search_fields = ('name',)
+
+class ProfessionalCenter(RevisionedDocument):
+    name = StringField(required=True)
+    location = StringField(required=True)
+    google_maps_embed = URLField(required=True)
+    diseases = ListField(StringField())
+    contact_info = DictField()  # {'phone': '...', 'email': '...', 'website': '...'}
+    hours_of_operation = StringField()  # Display text ("24/7", "9am-5pm Mon-Fri", etc.)
+    timezone = StringField()  # IANA name the hours are local to, e.g. "Europe/London"
+    # hours_of_operation parsed into [start, end) local minutes of the week (Monday 00:00 is 0)
+    opening_intervals = ListField(ListField(IntField()))
+
+    search_fields = ('name', 'location', 'diseases')
+
+    def clean(self):
+        super().clean()
+        self.opening_intervals = parse_hours(self.hours_of_operation) or []
+
+
+class RelatedDiseases(Document):
+    # Top-k similar cards per card, computed offline by app.related; kept out of
+    # DiseaseCard so recomputing it does not bump card revisions
+    id = ObjectIdField(primary_key=True)
+    neighbors = ListField(DictField())  # [{'id': '...', 'name': '...', 'score': 0.42}, ...]
+    computed_at = DateTimeField()
+
+    meta = {'collection': 'related_diseases'}
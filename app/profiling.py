@@ -0,0 +1,241 @@
+"""Opt-in per-request profiling.
+
+A profiled request is sampled by a background thread that records the
+request thread's stack every PROFILE_INTERVAL seconds, along with the stack
+of any query-pool thread doing work the request handed off (see
+``profiled``), each as its own speedscope profile; when the request
+ends the samples are written as a speedscope file (open it at
+https://www.speedscope.app) next to a JSON file listing every Mongo command
+the request issued, with its duration. The response carries the file name
+in X-Profile-Id.
+
+A request is profiled when it sends ``X-Profile: <PROFILE_TOKEN>`` or is
+picked at random with probability PROFILE_SAMPLE_RATE. With neither set,
+nothing is hooked at all; otherwise an unprofiled request costs one header
+lookup and one random number, and a Mongo command one dict lookup.
+
+    PROFILE_TOKEN         secret that enables profiling through the header
+    PROFILE_SAMPLE_RATE   share of requests profiled at random (default 0)
+    PROFILE_INTERVAL      seconds between stack samples (default 0.005)
+    PROFILE_DIR           output directory (default <tmp>/rare_profiles)
+"""
+import datetime
+import hmac
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from flask import g, request
+from pymongo import monitoring
+
+# Characters of each Mongo command kept in the command log
+COMMAND_PREVIEW = 500
+
+# Thread id -> the RequestProfile it is working for, for the sampler and command listener
+_active = {}
+
+
+def profiled(fn):
+    """``fn``, made to count towards the calling thread's profile when it runs on another thread."""
+    profile = _active.get(threading.get_ident())
+    if profile is None:
+        return fn
+    return lambda: profile.attach(fn)
+
+
+class RequestProfile:
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.frames = []
+        self.frame_index = {}
+        # thread id -> (seconds into the request it joined, samples, weights); the request thread first
+        self.threads = {self.thread_id: (0.0, [], [])}
+        self.commands = []
+        self.pending = {}
+        self.started_at = datetime.datetime.utcnow()
+        self.start = time.perf_counter()
+        self.end = None
+        self._stopping = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start_sampling(self):
+        _active[self.thread_id] = self
+        self._sampler.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._sampler.join()
+        for thread_id in list(self.threads):
+            if _active.get(thread_id) is self:
+                del _active[thread_id]
+        self.end = time.perf_counter()
+
+    def attach(self, fn):
+        """Run ``fn`` on the current thread, sampling it and timing its commands as part of this profile."""
+        thread_id = threading.get_ident()
+        if self._stopping.is_set():
+            return fn()
+        self.threads.setdefault(thread_id, (time.perf_counter() - self.start, [], []))
+        _active[thread_id] = self
+        try:
+            return fn()
+        finally:
+            if _active.get(thread_id) is self:
+                del _active[thread_id]
+
+    def _frame(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self.frame_index.get(key)
+        if index is None:
+            index = self.frame_index[key] = len(self.frames)
+            self.frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+        return index
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stopping.wait(self.interval):
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for thread_id, (_, samples, weights) in list(self.threads.items()):
+                # Helper threads only while they work for this request
+                if thread_id != self.thread_id and _active.get(thread_id) is not self:
+                    continue
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    stack.reverse()
+                    samples.append(stack)
+                    weights.append(now - last)
+            last = now
+
+    @property
+    def samples(self):
+        return [sample for _, samples, _ in self.threads.values() for sample in samples]
+
+    def speedscope(self, name):
+        profiles = []
+        for thread_id, (offset, samples, weights) in self.threads.items():
+            if thread_id != self.thread_id and not samples:
+                continue
+            profiles.append({
+                'type': 'sampled',
+                'name': name if thread_id == self.thread_id else '%s [thread %d]' % (name, thread_id),
+                'unit': 'seconds',
+                'startValue': offset,
+                'endValue': offset + sum(weights),
+                'samples': samples,
+                'weights': weights,
+            })
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'rare-living-foundation',
+            'shared': {'frames': self.frames},
+            'profiles': profiles,
+        }
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Records Mongo commands issued by threads that are being profiled."""
+
+    def started(self, event):
+        profile = _active.get(threading.get_ident())
+        if profile is None:
+            return
+        command = json.dumps(event.command, default=str)
+        profile.pending[event.request_id] = {
+            'command': event.command_name,
+            'database': event.database_name,
+            'offset_ms': round((time.perf_counter() - profile.start) * 1000, 3),
+            'body': command[:COMMAND_PREVIEW],
+        }
+
+    def succeeded(self, event):
+        self._finish(event, None)
+
+    def failed(self, event):
+        self._finish(event, str(event.failure))
+
+    @staticmethod
+    def _finish(event, error):
+        profile = _active.get(threading.get_ident())
+        entry = profile and profile.pending.pop(event.request_id, None)
+        if entry is None:
+            return
+        entry['duration_ms'] = event.duration_micros / 1000
+        if error:
+            entry['error'] = error
+        profile.commands.append(entry)
+
+
+class Profiler:
+    def __init__(self, token=None, sample_rate=None, interval=None, directory=None):
+        self.token = token if token is not None else os.getenv('PROFILE_TOKEN', '')
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+        self.interval = interval if interval is not None else float(os.getenv('PROFILE_INTERVAL', '0.005'))
+        self.directory = directory or os.getenv(
+            'PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'rare_profiles')
+        )
+
+    @property
+    def enabled(self):
+        return bool(self.token) or self.sample_rate > 0
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        # Only clients created after this see the listener, so it must run before the first query
+        monitoring.register(CommandTimer())
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+
+    def wanted(self):
+        header = request.headers.get('X-Profile')
+        if header and self.token and hmac.compare_digest(header, self.token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def before_request(self):
+        if self.wanted():
+            g.profile = RequestProfile(self.interval)
+            g.profile_id = '%s-%s-%d-%d' % (
+                g.profile.started_at.strftime('%Y%m%dT%H%M%S%f'),
+                request.endpoint or 'unknown',
+                os.getpid(),
+                g.profile.thread_id,
+            )
+            g.profile.start_sampling()
+
+    def after_request(self, response):
+        if 'profile_id' in g:
+            response.headers['X-Profile-Id'] = g.profile_id
+        return response
+
+    def teardown_request(self, exc=None):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return
+        profile.stop()
+        name = '%s %s' % (request.method, request.full_path.rstrip('?'))
+        base = os.path.join(self.directory, g.profile_id)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(base + '.speedscope.json', 'w', encoding='utf-8') as f:
+            json.dump(profile.speedscope(name), f)
+        with open(base + '.commands.json', 'w', encoding='utf-8') as f:
+            json.dump({
+                'request': name,
+                'started_at': profile.started_at.isoformat() + 'Z',
+                'duration_ms': round((profile.end - profile.start) * 1000, 3),
+                'samples': len(profile.samples),
+                'mongo_ms': round(sum(c['duration_ms'] for c in profile.commands), 3),
+                'commands': profile.commands,
+            }, f, indent=2)
@@ -0,0 +1,109 @@
+"""Precomputed "related diseases" neighbour table.
+
+Each card is a sparse binary vector over its symptoms, causes and
+treatments (casefolded, prefixed by field so a symptom never matches a
+cause), weighted by IDF so that sharing a rare feature counts more than
+sharing "Genetic mutation". Cosine similarity is computed sparse-by-sparse
+through an inverted index, so only pairs that share a feature are ever
+scored, and the top ``k`` neighbours of every card are stored in the
+related_diseases collection. Serving a card's neighbours is then a single
+primary-key lookup.
+"""
+from collections import defaultdict
+import datetime
+import heapq
+import math
+
+import click
+from pymongo import ReplaceOne
+
+FEATURE_FIELDS = ('symptoms', 'causes', 'treatments')
+TOP_K = 10
+# Features on more than this share of cards say little and would make scoring quadratic
+MAX_DOCUMENT_FREQUENCY = 0.2
+# Below this many cards every pair is cheap to score, and on a small catalogue the
+# cutoff would drop most features (a symptom shared by 3 of 10 cards is not noise)
+MIN_CARDS_FOR_CUTOFF = 1000
+
+
+def features(doc):
+    return {
+        field + ':' + value.strip().casefold()
+        for field in FEATURE_FIELDS
+        for value in doc.get(field) or ()
+        if value and value.strip()
+    }
+
+
+def top_neighbors(docs, k=TOP_K, max_df=MAX_DOCUMENT_FREQUENCY, min_cards=MIN_CARDS_FOR_CUTOFF):
+    """Map each doc ``_id`` to its ``k`` most similar docs as ``(score, _id)``, best first.
+
+    Features on more than ``max_df`` of the docs are ignored once there are
+    at least ``min_cards`` docs.
+    """
+    vectors = [features(doc) for doc in docs]
+    postings = defaultdict(list)
+    for i, vector in enumerate(vectors):
+        for feature in vector:
+            postings[feature].append(i)
+
+    n = len(docs)
+    df_limit = n if n < min_cards else max(2, int(max_df * n))
+    weights = {
+        feature: math.log((1 + n) / (1 + len(rows))) + 1
+        for feature, rows in postings.items()
+        if len(rows) <= df_limit
+    }
+    norms = [math.sqrt(sum(weights.get(f, 0) ** 2 for f in vector)) for vector in vectors]
+
+    neighbors = {}
+    for i, vector in enumerate(vectors):
+        scores = defaultdict(float)
+        for feature in vector:
+            weight = weights.get(feature)
+            if weight is None:
+                continue
+            for j in postings[feature]:
+                if j != i:
+                    scores[j] += weight * weight
+        best = heapq.nlargest(k, ((score / (norms[i] * norms[j]), j) for j, score in scores.items()))
+        neighbors[docs[i]['_id']] = [(round(score, 4), docs[j]['_id'], docs[j]['name']) for score, j in best]
+    return neighbors
+
+
+def rebuild_related(disease_model, related_model, k=TOP_K):
+    """Recompute the whole neighbour table from the current cards."""
+    projection = {'name': 1}
+    projection.update({field: 1 for field in FEATURE_FIELDS})
+    docs = list(disease_model._get_collection().find({}, projection))
+    computed_at = datetime.datetime.utcnow()
+
+    operations = [
+        ReplaceOne(
+            {'_id': card_id},
+            {
+                '_id': card_id,
+                'neighbors': [{'id': str(other), 'name': name, 'score': score} for score, other, name in best],
+                'computed_at': computed_at,
+            },
+            upsert=True,
+        )
+        for card_id, best in top_neighbors(docs, k).items()
+    ]
+    collection = related_model._get_collection()
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+    # Cards that no longer exist
+    collection.delete_many({'computed_at': {'$lt': computed_at}})
+    return len(operations)
+
+
+@click.command('rebuild-related')
+@click.option('-k', type=int, default=TOP_K, help='Neighbours kept per card.')
+def rebuild_related_command(k):
+    """Recompute the related-diseases table."""
+    from app import connect_database
+    from app.models import DiseaseCard, RelatedDiseases
+
+    connect_database()
+    click.echo('%d cards indexed' % rebuild_related(DiseaseCard, RelatedDiseases, k))
@@ -0,0 +1,53 @@
+"""Single-flight coalescing of identical concurrent queries.
+
+While a query for a key is running, any other thread asking for the same
+key gets the Future of that call and shares its result (or its exception)
+instead of running the query again. Nothing is cached: once the call
+returns the key is forgotten, so the next request starts a fresh query.
+
+Coalescing is per worker process; gthread workers make it effective, as
+all of a worker's threads share one SingleFlight.
+"""
+import threading
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.futures = {}
+        self.requests = 0
+        self.executions = 0
+
+    def submit(self, executor, key, fn):
+        """The Future of the call in flight for ``key``, started on ``executor`` if none is.
+
+        Callers can then wait on it with their own timeout, and a call whose
+        callers all gave up still finishes and is shared until it does.
+        """
+        with self.lock:
+            self.requests += 1
+            future = self.futures.get(key)
+            if future is not None:
+                return future
+            future = self.futures[key] = executor.submit(fn)
+            self.executions += 1
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key, future):
+        with self.lock:
+            if self.futures.get(key) is future:
+                del self.futures[key]
+
+    def stats(self):
+        with self.lock:
+            requests, executions = self.requests, self.executions
+            in_flight = len(self.futures)
+        coalesced = requests - executions
+        return {
+            'requests': requests,
+            'executions': executions,
+            'coalesced': coalesced,
+            'coalescing_ratio': round(coalesced / requests, 4) if requests else 0.0,
+            'in_flight': in_flight,
+        }
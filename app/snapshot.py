@@ -0,0 +1,143 @@
+"""Read-only catalogue snapshot shared by every worker through mmap.
+
+File layout (all integers little-endian uint64)::
+
+    MAGIC | disease count | center count | meta length | meta | disease offsets | center offsets | data
+
+``meta`` is a small JSON object padded to a multiple of 8 bytes.
+
+Each collection's records are stored as compact JSON objects joined by
+commas, so a whole collection is one contiguous ``[...]`` body and any
+record is a slice between two offsets. Workers map the file read-only and
+build responses from those slices without decoding anything; the pages are
+shared through the OS page cache rather than copied into every process.
+
+Writers build a new file next to the old one and ``os.replace`` it into
+place, so readers only ever see a complete snapshot and pick up a new one by
+noticing that the inode changed.
+"""
+from contextlib import contextmanager
+import json
+import mmap
+import os
+import struct
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: no cross-process refresh lock
+    fcntl = None
+
+MAGIC = b'RLFCAT02'
+KINDS = ('diseases', 'centers')
+_HEADER = struct.Struct('<QQQ')
+
+
+def encode_record(doc):
+    return json.dumps(doc, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def write_snapshot(path, diseases, centers, meta=None):
+    """Atomically replace the snapshot at ``path``.
+
+    ``diseases`` and ``centers`` are iterables of JSON-ready dicts; ``meta``
+    is an optional JSON-ready dict stored alongside them.
+    """
+    bodies = [[encode_record(doc) for doc in records] for records in (diseases, centers)]
+    meta = encode_record(meta or {})
+    meta += b' ' * (-len(meta) % 8)
+    header_size = len(MAGIC) + _HEADER.size + len(meta) + 8 * sum(len(b) + 1 for b in bodies)
+
+    offsets = []
+    position = header_size
+    for records in bodies:
+        start = position
+        for record in records:
+            offsets.append(position)
+            position += len(record) + 1
+        # Sentinel: one past the trailing comma the last record does not have
+        offsets.append(position if records else start + 1)
+
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_HEADER.pack(*(len(b) for b in bodies), len(meta)))
+        f.write(meta)
+        f.write(struct.pack('<%dQ' % len(offsets), *offsets))
+        for records in bodies:
+            f.write(b','.join(records))
+            if records:
+                f.write(b'\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def snapshot_stat(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def refresh_lock(path, blocking=True):
+    """Serialise snapshot rebuilds across workers.
+
+    Yields False when ``blocking`` is off and another process already holds
+    the lock, in which case the caller should keep using the current file.
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(path + '.lock', 'w') as f:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(f, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class Snapshot:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.key = (st.st_ino, st.st_mtime_ns)
+        self.created_at = st.st_mtime
+
+        if self.buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError('%s is not a catalogue snapshot' % path)
+        *counts, meta_size = _HEADER.unpack_from(self.buffer, len(MAGIC))
+        position = len(MAGIC) + _HEADER.size
+        self.meta = json.loads(self.buffer[position:position + meta_size])
+        position += meta_size
+        self.offsets = {}
+        for kind, count in zip(KINDS, counts):
+            self.offsets[kind] = struct.unpack_from('<%dQ' % (count + 1), self.buffer, position)
+            position += 8 * (count + 1)
+
+    def __len__(self):
+        return sum(len(o) - 1 for o in self.offsets.values())
+
+    def count(self, kind):
+        return len(self.offsets[kind]) - 1
+
+    def record(self, kind, position):
+        offsets = self.offsets[kind]
+        return self.buffer[offsets[position]:offsets[position + 1] - 1]
+
+    def records(self, kind):
+        for position in range(self.count(kind)):
+            yield json.loads(self.record(kind, position))
+
+    def json_array(self, kind, positions=None):
+        """JSON array body for all records of ``kind`` or the given positions."""
+        offsets = self.offsets[kind]
+        if positions is None:
+            return b'[' + self.buffer[offsets[0]:offsets[-1] - 1] + b']'
+        return b'[' + b','.join(self.record(kind, p) for p in positions) + b']'
@@ -0,0 +1,100 @@
+"""Follow MongoDB change streams on the catalogue collections.
+
+Each worker runs one ChangeWatcher thread. Change streams need a replica set
+(a single-node one is enough locally, e.g. ``mongod --replSet rs0`` followed
+by ``rs.initiate()``); against a standalone server or mongomock the watcher
+reports itself unsupported and the app falls back to CATALOGUE_TTL refreshes.
+"""
+import logging
+import threading
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+log = logging.getLogger(__name__)
+
+# "The $changeStream stage is only supported on replica sets" and friends
+UNSUPPORTED_CODES = {40573, 40324, 115}
+# The stored resume token fell off the oplog; changes in between are lost
+HISTORY_LOST_CODES = {260, 280, 286}
+MAX_BACKOFF = 30
+
+
+class ChangeWatcher(threading.Thread):
+    """Calls ``on_change(change)`` for every change to ``collections``.
+
+    The resume token of the last handled change is kept on the watcher, so
+    after a network error or failover the stream is reopened exactly where it
+    stopped. ``start_at`` (a bson Timestamp) positions the very first stream,
+    typically at the cluster time the catalogue snapshot was read at.
+    """
+
+    def __init__(self, get_db, collections, on_change, start_at=None):
+        super().__init__(name='catalogue-change-watcher', daemon=True)
+        self.get_db = get_db
+        self.collections = list(collections)
+        self.on_change = on_change
+        self.start_at = start_at
+        self.resume_token = None
+        self.connected = threading.Event()
+        self.supported = True
+        self._stopping = threading.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _open(self, db):
+        kwargs = {'full_document': 'updateLookup', 'max_await_time_ms': 1000}
+        if self.resume_token is not None:
+            kwargs['resume_after'] = self.resume_token
+        elif self.start_at is not None:
+            kwargs['start_at_operation_time'] = self.start_at
+        return db.watch([{'$match': {'ns.coll': {'$in': self.collections}}}], **kwargs)
+
+    def handle(self, change):
+        """Pass ``change`` to ``on_change``; a failure there is logged, not fatal to the stream."""
+        try:
+            self.on_change(change)
+        except Exception:
+            log.exception("Handling %s change failed", change.get('operationType'))
+
+    def run(self):
+        backoff = 1
+        while not self._stopping.is_set():
+            db = self.get_db()
+            if not callable(getattr(type(db), 'watch', None)):
+                self.supported = False
+                log.info("Change streams not available; catalogue falls back to TTL refresh")
+                return
+            try:
+                with self._open(db) as stream:
+                    self.connected.set()
+                    backoff = 1
+                    while not self._stopping.is_set() and stream.alive:
+                        change = stream.try_next()
+                        if change is not None:
+                            self.handle(change)
+                        if change is not None and change['operationType'] == 'invalidate':
+                            self.resume_token = None
+                            self.start_at = None
+                            break
+                        self.resume_token = stream.resume_token
+            except OperationFailure as e:
+                if e.code in UNSUPPORTED_CODES:
+                    self.supported = False
+                    log.info("Change streams not supported (%s); catalogue falls back to TTL refresh", e)
+                    return
+                if e.code in HISTORY_LOST_CODES:
+                    # Let the owner reload everything, then follow from now on
+                    self.resume_token = None
+                    self.start_at = None
+                    self.handle({'operationType': 'invalidate'})
+                log.warning("Change stream failed: %s", e)
+            except PyMongoError as e:
+                log.warning("Change stream disconnected: %s", e)
+            except Exception:
+                log.exception("Change stream failed unexpectedly")
+            finally:
+                # Callers only trust the catalogue to be current while this is set
+                self.connected.clear()
+            self._stopping.wait(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
@@ -0,0 +1,268 @@
+"""Write-behind buffer for single-record edits.
+
+Requests don't write to Mongo themselves: they queue a WriteOp and wait. A
+flusher thread collects the ops that arrive within WRITE_BEHIND_INTERVAL
+seconds (or WRITE_BEHIND_MAX_BATCH of them), and commits each collection's
+share with one find, one counter update and one unordered bulk_write.
+Several edits of the same record in one batch collapse into a single
+replace.
+
+Concurrency is optimistic, on the record's ``revision``: a PATCH or DELETE
+names the revision it was based on and gets 409 if the record has moved on,
+whether the other write is in the same batch or came from another worker
+between our read and our write (every replace and delete is filtered on the
+revision that was read). A write error on one record, such as a name
+another worker took first, fails only the ops for that record; the rest of
+the batch is answered and patched into the catalogue as committed.
+"""
+import copy
+import datetime
+import logging
+import os
+import threading
+import time
+
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from app.folding import name_key
+from app.importer import clean_text, content_hash, editable_fields, normalize_record
+from app.models import Tombstone, reserve_revisions
+
+log = logging.getLogger(__name__)
+
+WRITE_BEHIND_INTERVAL = float(os.getenv('WRITE_BEHIND_INTERVAL', '0.05'))
+WRITE_BEHIND_MAX_BATCH = int(os.getenv('WRITE_BEHIND_MAX_BATCH', '500'))
+# Seconds a request waits for its op to be committed
+WRITE_TIMEOUT = float(os.getenv('WRITE_TIMEOUT', '10'))
+DUPLICATE_KEY = 11000
+
+
+class WriteOp:
+    """One insert, patch or delete; ``status`` and ``body`` are set once committed."""
+
+    def __init__(self, model, kind, action, record_id=None, expected=None, fields=None):
+        self.model = model
+        self.kind = kind  # importer schema name: 'diseases' or 'professional_centers'
+        self.action = action
+        self.record_id = record_id
+        self.expected = expected
+        self.fields = fields
+        self.status = None
+        self.body = None
+        self.done = threading.Event()
+
+    def resolve(self, status, body=None):
+        self.status = status
+        self.body = body
+        self.done.set()
+
+
+def build_document(model, record, revision):
+    record = dict(record, content_hash=content_hash(record))
+    doc = model.document(record)
+    doc['revision'] = revision
+    doc['updated_at'] = datetime.datetime.utcnow()
+    return doc
+
+
+def commit(model, kind, ops, on_commit=None):
+    """Apply ``ops`` (all for ``model``) in order and write the outcome in one bulk write.
+
+    ``on_commit(kind, {record_id: document or None})`` is called with the
+    records that changed before any op is answered, so a client never reads
+    its own write back from a catalogue that doesn't have it yet.
+    """
+    model.prepare_collection()
+    collection = model._get_collection()
+    ids = {ObjectId(op.record_id) for op in ops if op.action != 'insert'}
+    stored = {str(doc['_id']): doc for doc in collection.find({'_id': {'$in': list(ids)}})} if ids else {}
+    read_revisions = {record_id: doc.get('revision') for record_id, doc in stored.items()}
+    # Names clash case-insensitively, as in the importer and the unique name_key index
+    wanted_names = {
+        name_key(clean_text(op.fields['name'])) for op in ops if op.fields and isinstance(op.fields.get('name'), str)
+    }
+    names = {
+        doc['name_key']: str(doc['_id'])
+        for doc in collection.find({'name_key': {'$in': list(wanted_names)}}, {'name_key': 1})
+    } if wanted_names else {}
+
+    # The lease keeps /api/changes from reporting these revisions before they land
+    with reserve_revisions(len(ops)) as last:
+        revision = last - len(ops)
+        state = dict(stored)
+        inserted = set()
+        applied = []  # (op, record_id, status)
+        for op in ops:
+            revision += 1
+            if op.action == 'insert':
+                key = name_key(op.fields['name'])
+                if key in names:
+                    op.resolve(409, {"error": "A record with this name already exists", "id": names[key]})
+                    continue
+                doc = build_document(model, op.fields, revision)
+                doc['_id'] = ObjectId()
+                doc['created_revision'] = revision
+                record_id = str(doc['_id'])
+                state[record_id] = doc
+                inserted.add(record_id)
+                names[key] = record_id
+                applied.append((op, record_id, 201))
+                # Each op answers with the record as it stood right after it
+                op.body = copy.deepcopy(doc)
+                continue
+
+            current = state.get(op.record_id)
+            if current is None:
+                op.resolve(404, {"error": "Record not found"})
+                continue
+            if current.get('revision') != op.expected:
+                op.resolve(409, {"error": "Record has changed", "revision": current.get('revision')})
+                continue
+            if op.action == 'delete':
+                state[op.record_id] = None
+                names.pop(name_key(current['name']), None)
+                applied.append((op, op.record_id, 204))
+                continue
+
+            record = {field: current[field] for field in editable_fields(kind) if field in current}
+            record.update(op.fields)
+            record, errors = normalize_record(kind, record)
+            if errors:
+                op.resolve(400, {"error": "Invalid record", "errors": errors})
+                continue
+            key = name_key(record['name'])
+            if names.get(key, op.record_id) != op.record_id:
+                op.resolve(409, {"error": "A record with this name already exists", "id": names[key]})
+                continue
+            doc = build_document(model, record, revision)
+            doc['_id'] = current['_id']
+            doc['created_revision'] = current.get('created_revision', revision)
+            names.pop(name_key(current['name']), None)
+            names[key] = op.record_id
+            state[op.record_id] = doc
+            applied.append((op, op.record_id, 200))
+            op.body = copy.deepcopy(doc)
+
+        operations = []
+        targets = []  # record id of each operation
+        deleted = []
+        touched = {record_id for _, record_id, _ in applied}
+        for record_id in touched:
+            doc = state[record_id]
+            if record_id in inserted:
+                if doc is not None:
+                    operations.append(InsertOne(doc))
+                    targets.append(record_id)
+                continue
+            if doc is None:
+                operations.append(DeleteOne({'_id': ObjectId(record_id), 'revision': read_revisions[record_id]}))
+                deleted.append(record_id)
+            else:
+                operations.append(ReplaceOne({'_id': doc['_id'], 'revision': read_revisions[record_id]}, doc))
+            targets.append(record_id)
+
+        failed = {}  # record id -> write error
+        lost = set()
+        if operations:
+            try:
+                result = collection.bulk_write(operations, ordered=False)
+                matched = result.matched_count + result.deleted_count
+            except BulkWriteError as e:
+                # Unordered, so every operation without an error of its own was still applied
+                for error in e.details['writeErrors']:
+                    failed[targets[error['index']]] = error
+                matched = e.details['nMatched'] + e.details['nRemoved']
+            conditional = touched - inserted - set(failed)
+            if matched < len(conditional):
+                # Another worker wrote some of these records after we read them
+                landed = {
+                    str(doc['_id']): doc.get('revision')
+                    for doc in collection.find({'_id': {'$in': [ObjectId(i) for i in conditional]}}, {'revision': 1})
+                }
+                for record_id in conditional:
+                    doc = state[record_id]
+                    if (doc is None and record_id in landed) or (doc is not None and landed.get(record_id) != doc['revision']):
+                        lost.add(record_id)
+        lost.update(failed)
+        if deleted:
+            Tombstone.record(model, [record_id for record_id in deleted if record_id not in lost])
+    changed = {record_id: state[record_id] for record_id in touched - lost}
+    if changed and on_commit is not None:
+        try:
+            on_commit(kind, changed)
+        except Exception:
+            log.exception("Catalogue update after write failed")
+
+    for op, record_id, status in applied:
+        error = failed.get(record_id)
+        if error is not None and error.get('code') == DUPLICATE_KEY:
+            # Another worker took the name between our check and our write
+            op.resolve(409, {"error": "A record with this name already exists"})
+        elif error is not None:
+            op.resolve(503, {"error": "Write failed: %s" % error.get('errmsg')})
+        elif record_id in lost:
+            op.resolve(409, {"error": "Record has changed"})
+        elif status == 204:
+            op.resolve(204)
+        else:
+            op.resolve(status, op.body)
+
+
+class WriteBehind(threading.Thread):
+    """Flusher thread; ``on_commit(kind, {record_id: document or None})`` runs after each write."""
+
+    def __init__(self, on_commit, interval=WRITE_BEHIND_INTERVAL, max_batch=WRITE_BEHIND_MAX_BATCH):
+        super().__init__(name='write-behind', daemon=True)
+        self.on_commit = on_commit
+        self.interval = interval
+        self.max_batch = max_batch
+        self.queue = []
+        self.condition = threading.Condition()
+        self.batches = 0
+        self.ops = 0
+
+    def submit(self, op, timeout=WRITE_TIMEOUT):
+        """Queue ``op`` and wait for it; returns False if it was not committed in time."""
+        with self.condition:
+            self.queue.append(op)
+            self.condition.notify()
+        return op.done.wait(timeout)
+
+    def take(self):
+        with self.condition:
+            self.condition.wait_for(lambda: self.queue)
+            # Let a burst gather, unless the batch is already full
+            deadline = time.monotonic() + self.interval
+            while len(self.queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.condition.wait(remaining):
+                    break
+            ops, self.queue = self.queue[:self.max_batch], self.queue[self.max_batch:]
+            return ops
+
+    def run(self):
+        while True:
+            ops = self.take()
+            self.batches += 1
+            self.ops += len(ops)
+            by_model = {}
+            for op in ops:
+                by_model.setdefault(op.model, []).append(op)
+            for model, model_ops in by_model.items():
+                try:
+                    commit(model, model_ops[0].kind, model_ops, self.on_commit)
+                except Exception as e:
+                    log.exception("Write batch failed")
+                    for op in model_ops:
+                        if not op.done.is_set():
+                            op.resolve(503, {"error": "Write failed: %s" % e})
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'ops': self.ops,
+            'ops_per_batch': round(self.ops / self.batches, 2) if self.batches else 0.0,
+            'queued': len(self.queue),
+        }
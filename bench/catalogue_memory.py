@@ -0,0 +1,75 @@
+"""Compare the memory held by raw documents and by the encoded Catalogue.
+
+Each representation is built in a fresh interpreter so the RSS growth
+reported is what one gunicorn worker would pay for it.
+
+    python -m bench.catalogue_memory --cards 10000 --centers 1000
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tracemalloc
+
+from app.catalogue import Catalogue
+from bench.synthetic import disease_cards, professional_centers
+
+
+def rss_bytes():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * 4096
+
+
+def measure(kind, cards, centers):
+    # Documents are decoded one at a time from JSON lines, the way BSON is
+    # decoded from a cursor, so no strings are shared between documents.
+    disease_lines = [json.dumps(d, default=str) for d in disease_cards(cards)]
+    center_lines = [json.dumps(d, default=str) for d in professional_centers(centers, cards)]
+
+    rss_before = rss_bytes()
+    tracemalloc.start()
+    disease_docs = (json.loads(line) for line in disease_lines)
+    center_docs = (json.loads(line) for line in center_lines)
+    if kind == 'catalogue':
+        held = Catalogue(disease_docs, center_docs)
+    else:
+        held = (list(disease_docs), list(center_docs))
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss = rss_bytes() - rss_before
+    del held
+    return {'kind': kind, 'traced_bytes': traced, 'rss_bytes': rss}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cards', type=int, default=10000)
+    parser.add_argument('--centers', type=int, default=1000)
+    parser.add_argument('--kind', choices=['documents', 'catalogue'])
+    args = parser.parse_args()
+
+    if args.kind:
+        print(json.dumps(measure(args.kind, args.cards, args.centers)))
+        return
+
+    results = []
+    for kind in ('documents', 'catalogue'):
+        out = subprocess.run(
+            [sys.executable, '-m', 'bench.catalogue_memory', '--kind', kind,
+             '--cards', str(args.cards), '--centers', str(args.centers)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(out))
+    docs, cat = results
+    print(json.dumps({
+        'cards': args.cards,
+        'centers': args.centers,
+        'documents': docs,
+        'catalogue': cat,
+        'traced_reduction': 1 - cat['traced_bytes'] / docs['traced_bytes'],
+        'rss_reduction': 1 - cat['rss_bytes'] / docs['rss_bytes'],
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
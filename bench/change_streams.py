@@ -0,0 +1,102 @@
+"""Check change-stream propagation against a local single-node replica set.
+
+    mongod --replSet rs0 --dbpath /tmp/rs0 &
+    mongosh --eval 'rs.initiate()'
+    python -m bench.change_streams --mongo-uri 'mongodb://localhost:27017/?replicaSet=rs0'
+
+Seeds a small synthetic catalogue, then updates, inserts and deletes
+documents through a separate client and reports how long each change takes
+to show up in this worker's catalogue without any snapshot reload. Also
+drops the watcher's connection once to check it resumes from its token.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from pymongo import MongoClient
+
+from bench.synthetic import disease_cards, professional_centers
+
+DATABASE = 'rare_diseases_change_streams'
+
+
+def wait_for(predicate, timeout=10):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if predicate():
+            return time.perf_counter() - start
+        time.sleep(0.001)
+    raise TimeoutError('change not applied within %ss' % timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', required=True)
+    parser.add_argument('--changes', type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ['CATALOGUE_SNAPSHOT'] = os.path.join(tempfile.mkdtemp(), 'catalogue.snapshot')
+    os.environ['CATALOGUE_TTL'] = '3600'
+    import app.api as api
+    from app import connect_database
+
+    connect_database(DATABASE, host=args.mongo_uri)
+
+    writer = MongoClient(args.mongo_uri)[DATABASE]
+    diseases = writer[api.DiseaseCard._get_collection_name()]
+    centers = writer[api.ProfessionalCenter._get_collection_name()]
+    diseases.delete_many({})
+    centers.delete_many({})
+    diseases.insert_many(list(disease_cards(1000)))
+    centers.insert_many(list(professional_centers(100, 1000)))
+    api.publish_catalogue()
+
+    api.get_catalogue()
+    if not api._watcher.connected.wait(10):
+        raise SystemExit('change stream did not connect; is this a replica set?')
+
+    def visible(record_id, predicate):
+        catalogue = api.get_catalogue()
+        position = catalogue.positions['diseases'].get(record_id)
+        return predicate(catalogue, position)
+
+    latencies = {'update': [], 'insert': [], 'delete': []}
+    for i in range(args.changes):
+        doc = diseases.find_one(skip=i)
+        record_id = str(doc['_id'])
+        value = 'Rare %d' % i
+        diseases.update_one({'_id': doc['_id']}, {'$set': {'prevalance': value}})
+        latencies['update'].append(wait_for(lambda: visible(record_id, lambda c, p: (
+            p is not None and c.table.decode(c.diseases[p].prevalance) == value))))
+
+        new = next(disease_cards(1, seed=1000 + i))
+        diseases.insert_one(new)
+        latencies['insert'].append(wait_for(lambda: visible(str(new['_id']), lambda c, p: (
+            p is not None and c.live['diseases'] >> p & 1))))
+
+        diseases.delete_one({'_id': new['_id']})
+        latencies['delete'].append(wait_for(lambda: visible(str(new['_id']), lambda c, p: (
+            not c.live['diseases'] >> p & 1))))
+
+    # Kill the watcher's sockets; the next stream must resume without missing this update
+    token = api._watcher.resume_token
+    api.get_db().client.close()
+    doc = diseases.find_one()
+    diseases.update_one({'_id': doc['_id']}, {'$set': {'prevalance': 'After reconnect'}})
+    resumed = wait_for(lambda: visible(str(doc['_id']), lambda c, p: (
+        c.table.decode(c.diseases[p].prevalance) == 'After reconnect')), timeout=60)
+
+    print(json.dumps({
+        kind: {
+            'count': len(values),
+            'p50_ms': sorted(values)[len(values) // 2] * 1000,
+            'max_ms': max(values) * 1000,
+        }
+        for kind, values in latencies.items()
+    } | {'resumed_after_reconnect_ms': resumed * 1000, 'had_resume_token': token is not None}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Compare two bench.load result files.
+
+    python -m bench.compare before.json after.json
+
+Prints, per (size, endpoint), the throughput and latency of both runs and
+the after/before ratio. When a file holds several runs the last result for
+each (size, endpoint) wins.
+"""
+import argparse
+import json
+
+METRICS = ('throughput_rps', 'p50_ms', 'p99_ms')
+
+
+def load(path):
+    results = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                result = json.loads(line)
+                results[(result['size'], result['endpoint'])] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    print('%-8s %-28s %-14s %12s %12s %8s' % ('size', 'endpoint', 'metric', 'before', 'after', 'ratio'))
+    for key in sorted(set(before) & set(after)):
+        for metric in METRICS:
+            old, new = before[key].get(metric), after[key].get(metric)
+            if old is None or new is None:
+                continue
+            ratio = new / old if old else float('inf')
+            print('%-8d %-28s %-14s %12.2f %12.2f %8.2f' % (key[0], key[1], metric, old, new, ratio))
+
+
+if __name__ == '__main__':
+    main()
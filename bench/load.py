@@ -0,0 +1,224 @@
+"""HTTP load benchmark for every API endpoint against a local Mongo stand-in.
+
+For each catalogue size the collections are filled with synthetic documents,
+the Flask app is served on a local port, and every endpoint is driven by
+``--concurrency`` keep-alive clients. One JSON object per (size, endpoint)
+is written to ``--output`` (or stdout) so runs can be diffed with
+``python -m bench.compare old.json new.json``.
+
+    pip install -r requirements-bench.txt
+    python -m bench.load --sizes 1000 10000 --requests 500 --output bench_output.txt
+    python -m bench.load --mongo-uri mongodb://localhost:27017  # real local mongod
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+from bench.synthetic import disease_cards, professional_centers
+
+# Paths are formatted with what fill() returns for the catalogue they run against
+ENDPOINTS = [
+    ('diseases', '/api/diseases'),
+    ('diseases_search', '/api/diseases?q=syndrome+1'),
+    ('diseases_filter', '/api/diseases?prevalance=Extremely+rare&cause=Genetic+mutation'),
+    ('diseases_facets', '/api/diseases/facets?treatment=Physical+therapy'),
+    ('diseases_related', '/api/diseases/{disease_id}/related'),
+    ('professional_centers', '/api/professional_centers'),
+    ('professional_centers_search', '/api/professional_centers?q=tokyo'),
+    ('search', '/api/search?q=syndrome+1'),
+    ('changes', '/api/changes?since={since}'),
+    ('export', '/api/export?collection=diseases&format=ndjson'),
+    ('metrics', '/api/metrics'),
+]
+# seed_data replaces the synthetic catalogue, so it is measured last with few requests
+SEED_ENDPOINT = ('seed_data', '/api/seed_data')
+# Revisions /api/changes is asked for: an incremental sync, not the whole catalogue
+CHANGES_WINDOW = 100
+INSERT_BATCH = 1000
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def connect_database(mongo_uri):
+    os.environ.setdefault('CATALOGUE_SNAPSHOT', os.path.join(tempfile.mkdtemp(), 'catalogue.snapshot'))
+    os.environ.setdefault('CATALOGUE_TTL', '3600')
+    # All load comes from one address; set these lower to exercise load shedding
+    os.environ.setdefault('RATE_LIMIT_PER_SECOND', '1000000')
+    os.environ.setdefault('RATE_LIMIT_BURST', '1000000')
+    # werkzeug gives every connection its own thread, so there is no gunicorn thread count to size slots by
+    os.environ.setdefault('ADMISSION_SLOTS', '1000000')
+    import app.api
+    from app import connect_database, create_app
+
+    if mongo_uri:
+        connect_database('rare_diseases_bench', host=mongo_uri)
+    else:
+        import mongomock
+
+        connect_database('rare_diseases_bench', host='mongodb://localhost', mongo_client_class=mongomock.MongoClient)
+    return app.api, create_app()
+
+
+def fill(api, size, centers):
+    """Replace the catalogue with synthetic records; returns timings and the ENDPOINTS parameters."""
+    from app.models import RelatedDiseases, reserve_revisions
+
+    start = time.perf_counter()
+    first_disease = None
+    with reserve_revisions(size + centers) as last:
+        revision = last - size - centers
+        for model, docs in ((api.DiseaseCard, disease_cards(size)),
+                            (api.ProfessionalCenter, professional_centers(centers, size))):
+            collection = model._get_collection()
+            collection.delete_many({})
+            batch = []
+            for doc in docs:
+                revision += 1
+                doc['revision'] = doc['created_revision'] = revision
+                batch.append(doc)
+                if len(batch) == INSERT_BATCH:
+                    collection.insert_many(batch)
+                    batch = []
+            if batch:
+                collection.insert_many(batch)
+            if first_disease is None:
+                first_disease = collection.find_one({}, {'name': 1})
+    # Serving reads one precomputed row; computing the whole table is not what is measured here
+    neighbors = api.DiseaseCard._get_collection().find({'_id': {'$ne': first_disease['_id']}}, {'name': 1}).limit(10)
+    RelatedDiseases._get_collection().replace_one(
+        {'_id': first_disease['_id']},
+        {'neighbors': [{'id': str(doc['_id']), 'name': doc['name'], 'score': 0.5} for doc in neighbors]},
+        upsert=True,
+    )
+    inserted = time.perf_counter() - start
+    api.publish_catalogue()
+    setup = {'insert_seconds': inserted, 'publish_seconds': time.perf_counter() - start - inserted}
+    return setup, {'disease_id': str(first_disease['_id']), 'since': max(0, last - CHANGES_WINDOW)}
+
+
+def serve(flask_app):
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def drive(port, path, requests, concurrency):
+    latencies = []
+    errors = []
+    rejected = []
+    received = [0]
+    lock = threading.Lock()
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+
+    def client(count):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local = []
+        local_bytes = 0
+        local_errors = 0
+        local_rejected = 0
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                body = response.read()
+                if response.status in (429, 503):
+                    # Shed by admission control: counted, but not an accepted latency
+                    local_rejected += 1
+                    continue
+                if response.status != 200:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                continue
+            local.append(time.perf_counter() - start)
+            local_bytes += len(body)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors.append(local_errors)
+            rejected.append(local_rejected)
+            received[0] += local_bytes
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in per_client if n]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': sum(errors),
+        'rejected': sum(rejected),
+        'seconds': elapsed,
+        'throughput_rps': len(latencies) / elapsed if elapsed else None,  # accepted requests only
+        'p50_ms': percentile(latencies, 0.50) * 1000 if latencies else None,
+        'p99_ms': percentile(latencies, 0.99) * 1000 if latencies else None,
+        'mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else None,
+        'bytes_per_request': received[0] / len(latencies) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--centers-ratio', type=float, default=0.1, help='centers per disease card')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--seed-requests', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--mongo-uri', help='use this mongod instead of mongomock')
+    parser.add_argument('--output', help='append JSON lines here instead of stdout')
+    args = parser.parse_args()
+
+    api, flask_app = connect_database(args.mongo_uri)
+    server = serve(flask_app)
+    out = open(args.output, 'a') if args.output else sys.stdout
+    run = {
+        'started_at': time.time(),
+        'python': platform.python_version(),
+        'backend': 'mongod' if args.mongo_uri else 'mongomock',
+    }
+    try:
+        for size in args.sizes:
+            centers = max(1, int(size * args.centers_ratio))
+            setup, params = fill(api, size, centers)
+            out.write(json.dumps(dict(run, size=size, centers=centers, endpoint='fill', **setup)) + '\n')
+            for name, path in ENDPOINTS + [SEED_ENDPOINT]:
+                path = path.format(**params)
+                requests = args.seed_requests if name == SEED_ENDPOINT[0] else args.requests
+                concurrency = 1 if name == SEED_ENDPOINT[0] else args.concurrency
+                if name != SEED_ENDPOINT[0] and args.warmup:
+                    drive(server.port, path, args.warmup, 1)
+                result = drive(server.port, path, requests, concurrency)
+                out.write(json.dumps(dict(run, size=size, centers=centers, endpoint=name, path=path, **result)) + '\n')
+                out.flush()
+    finally:
+        server.shutdown()
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
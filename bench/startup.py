@@ -0,0 +1,165 @@
+"""Cold-start benchmark: import cost and time to the first served request.
+
+    python -m bench.startup                      # mongomock stand-in, in process
+    python -m bench.startup --mongo-uri mongodb://localhost:27017
+
+Runs ``-X importtime`` on ``create_app()`` and lists the slowest imports,
+then times from just before a fresh process is spawned to the first
+response. With ``--mongo-uri`` that process is gunicorn with the repo's
+gunicorn.conf.py, so the catalogue is published in ``when_ready`` before
+the worker forks, as on Render; without it the mongomock stand-in cannot
+be shared across processes, so a plain interpreter builds the app and
+serves one request through the test client. Each run starts from no
+catalogue snapshot, in a temporary directory removed at the end. The
+target on Render's free plan is a first request in under a second.
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+TARGET_SECONDS = 1.0
+# How long gunicorn may take to answer at all before the run is abandoned
+STARTUP_TIMEOUT = 60.0
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_REQUEST = '''
+import sys, time
+import mongomock
+from app import connect_database, create_app
+connect_database(host='mongodb://localhost', mongo_client_class=mongomock.MongoClient)
+app = create_app()
+response = app.test_client().get({path!r})
+assert response.status_code == 200, response.status_code
+print(time.time())
+'''
+
+
+def import_times():
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'from app import create_app; create_app()'],
+        check=True, capture_output=True, text=True,
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        modules.append({
+            'module': name.strip(),
+            # Nested imports are indented by two spaces per level
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+        })
+    top_level = [m for m in modules if m['depth'] == 0]
+    return {
+        'total_us': sum(m['cumulative_us'] for m in top_level),
+        'slowest': sorted(top_level, key=lambda m: -m['cumulative_us'])[:15],
+    }
+
+
+def first_request(path, runs, snapshot):
+    code = FIRST_REQUEST.format(path=path)
+    env = dict(os.environ, CATALOGUE_SNAPSHOT=snapshot)
+    timings = []
+    for _ in range(runs):
+        remove(snapshot)
+        start = time.time()
+        out = subprocess.run(
+            [sys.executable, '-c', code], check=True, capture_output=True, text=True, env=env, cwd=ROOT,
+        ).stdout
+        timings.append(float(out.strip().splitlines()[-1]) - start)
+    return summary(path, runs, timings, 'test client')
+
+
+def gunicorn_first_request(mongo_uri, path, runs, snapshot):
+    env = dict(os.environ, MONGO_URI=mongo_uri, CATALOGUE_SNAPSHOT=snapshot)
+    timings = []
+    for _ in range(runs):
+        remove(snapshot)
+        port = free_port()
+        start = time.time()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', '127.0.0.1:%d' % port, 'run:app'],
+            env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        try:
+            status = wait_for_response(port, path, server)
+            timings.append(time.time() - start)
+        finally:
+            server.terminate()
+            _, stderr = server.communicate(timeout=30)
+        if status != 200:
+            raise SystemExit('gunicorn answered %s %s\n%s' % (path, status, stderr.decode(errors='replace')))
+    return summary(path, runs, timings, 'gunicorn')
+
+
+def wait_for_response(port, path, server):
+    """Status of the first response gunicorn gives on ``port``, polling until it listens."""
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if server.poll() is not None:
+            return 'none: gunicorn exited with %d' % server.returncode
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=STARTUP_TIMEOUT)
+        try:
+            connection.request('GET', path)
+            return connection.getresponse().status
+        except (ConnectionRefusedError, ConnectionResetError):
+            time.sleep(0.01)
+        finally:
+            connection.close()
+    return 'none within %.0fs' % STARTUP_TIMEOUT
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def remove(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def summary(path, runs, timings, server):
+    timings.sort()
+    return {
+        'path': path, 'server': server, 'runs': runs,
+        'min_s': timings[0], 'median_s': timings[len(timings) // 2], 'max_s': timings[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/api/diseases')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='startup-bench-')
+    snapshot = os.path.join(directory, 'catalogue.snapshot')
+    try:
+        result = {
+            'imports': import_times(),
+            'first_request': (
+                gunicorn_first_request(args.mongo_uri, args.path, args.runs, snapshot) if args.mongo_uri
+                else first_request(args.path, args.runs, snapshot)
+            ),
+            'target_s': TARGET_SECONDS,
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    result['within_target'] = result['first_request']['median_s'] < TARGET_SECONDS
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Synthetic DiseaseCard / ProfessionalCenter documents for benchmarks.
+
+Values are drawn from small vocabularies so that, like the seeded data,
+prevalance, causes, treatments and resource URLs repeat across cards.
+"""
+import random
+
+from bson import ObjectId
+
+from app.folding import search_prefixes
+
+PREVALANCE = ['Rare', 'Very rare', 'Extremely rare']
+SYMPTOMS = [
+    'Seizures', 'Muscle weakness', 'Fatigue', 'Developmental delay', 'Joint pain',
+    'Vision problems', 'Hearing loss', 'Frequent infections', 'Skin lesions',
+    'Difficulty walking', 'Intellectual disability', 'Short stature', 'Tremors',
+    'Headache', 'Shortness of breath', 'Chronic pain', 'Hypotonia', 'Anemia',
+]
+CAUSES = [
+    'Genetic mutation', 'Autosomal recessive inheritance', 'Autosomal dominant inheritance',
+    'Autoimmune reaction', 'Environmental triggers', 'Enzyme deficiency',
+    'Prion infection', 'Unknown', 'Chromosomal abnormality', 'Metabolic disorder',
+]
+TREATMENTS = [
+    'Symptom management', 'Physical therapy', 'Supportive care', 'Pain management',
+    'Enzyme replacement therapy', 'Immunoglobulin therapy', 'Stem cell transplant',
+    'Surgery', 'Speech therapy', 'Anticonvulsants', 'Diet management', 'Corticosteroids',
+]
+RESOURSES = [
+    'https://www.rarediseases.org', 'https://rarediseases.info.nih.gov',
+    'https://www.rareconnect.org', 'https://www.orpha.net', 'https://www.ninds.nih.gov',
+    'https://www.cdc.gov/ncbddd', 'https://medlineplus.gov/genetics',
+]
+CITIES = [
+    'Toronto, Ontario, Canada', 'Los Angeles, California, USA', 'Paris, France',
+    'London, United Kingdom', 'Berlin, Germany', 'Tokyo, Japan', 'Sydney, Australia',
+    'Mumbai, Maharashtra, India', 'Cape Town, South Africa', 'Rome, Italy',
+]
+HOURS = ['9am - 5pm Mon-Fri', '9am - 6pm Mon-Fri', '8am - 4pm Mon-Fri', '9am - 5pm Mon-Sat', '24/7']
+
+
+def disease_cards(count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        name = 'Synthetic Syndrome %d' % i
+        yield {
+            '_id': ObjectId(),
+            'name': name,
+            'symptoms': rng.sample(SYMPTOMS, 3),
+            'causes': rng.sample(CAUSES, rng.randint(1, 3)),
+            'treatments': rng.sample(TREATMENTS, rng.randint(1, 3)),
+            'prevalance': rng.choice(PREVALANCE),
+            'resourses': rng.sample(RESOURSES, rng.randint(1, 2)),
+            'search_prefixes': search_prefixes(name),
+        }
+
+
+def professional_centers(count, disease_count, seed=0):
+    rng = random.Random(seed + 1)
+    for i in range(count):
+        name = 'Synthetic Rare Disease Center %d' % i
+        slug = 'center%d' % i
+        location = rng.choice(CITIES)
+        diseases = ['Synthetic Syndrome %d' % rng.randrange(max(disease_count, 1)) for _ in range(2)]
+        yield {
+            '_id': ObjectId(),
+            'name': name,
+            'location': location,
+            'google_maps_embed': 'https://maps.google.com/?q=' + name.replace(' ', '+'),
+            'diseases': diseases,
+            'contact_info': {
+                'phone': '+1 555-%04d' % (i % 10000),
+                'email': 'info@%s.org' % slug,
+                'website': 'https://%s.org' % slug,
+            },
+            'hours_of_operation': rng.choice(HOURS),
+            'search_prefixes': search_prefixes(name, location, diseases),
+        }
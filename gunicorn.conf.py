@@ -0,0 +1,29 @@
+import os
+
+# Build the app once in the master so the catalogue snapshot is published
+# before workers fork; every worker then maps the same file read-only.
+preload_app = True
+
+# gthread workers. Requests beyond the threads queue here, out of the app's
+# reach, so admission control (app/admission.py) admits one less than the
+# threads by default and keeps the last one free to shed load with 503s
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+
+def when_ready(server):
+    from app import connect_database
+    from app.api import publish_catalogue
+
+    from mongoengine.connection import ConnectionFailure, get_connection
+
+    try:
+        connect_database()
+        publish_catalogue()
+    except Exception as e:
+        server.log.warning("Catalogue snapshot not published: %s", e)
+    finally:
+        # Workers must not share the master's Mongo sockets; they reconnect lazily
+        try:
+            get_connection().close()
+        except ConnectionFailure:
+            pass  # never connected
@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+# Read when app.api and app.breaker are imported, so set before any test imports them
+os.environ.update({
+    'QUERY_DEADLINE': '0.2',
+    'BREAKER_FAILURES': '3',
+    'BREAKER_RESET': '1',
+    'RATE_LIMIT_BURST': '100000',
+    'RATE_LIMIT_PER_SECOND': '100000',
+    'CATALOGUE_CHANGE_STREAMS': '0',
+    'CATALOGUE_SNAPSHOT': os.path.join(tempfile.mkdtemp(), 'catalogue.snapshot'),
+    'WRITE_API_TOKEN': 'test-token',
+})
+
+import mongomock  # noqa: E402
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """An empty mongomock database behind the app's default connection."""
+    from mongoengine.connection import get_db
+
+    from app import connect_database
+    from app import models
+    from app.models import DiseaseCard, ProfessionalCenter, RelatedDiseases, Tombstone
+
+    connect_database('rare_diseases_test', host='mongodb://localhost', mongo_client_class=mongomock.MongoClient)
+    database = get_db()
+    for name in database.list_collection_names():
+        database.drop_collection(name)
+    for model in (DiseaseCard, ProfessionalCenter, RelatedDiseases, Tombstone):
+        model._collection = None
+        model._prepared = False
+    models._leases_indexed = False
+    return database
+
+
+@pytest.fixture
+def api(db):
+    """app.api with a fresh catalogue, snapshot and query guard."""
+    import app.api as api
+    from app.breaker import GuardedQueries
+    from app.singleflight import SingleFlight
+
+    if os.path.exists(api.CATALOGUE_SNAPSHOT):
+        os.remove(api.CATALOGUE_SNAPSHOT)
+    api._snapshot = None
+    api._catalogue = None
+    api._pending_changes = []
+    api._searches = SingleFlight()
+    api._queries = GuardedQueries(api._searches)
+    api.CATALOGUE_TTL = 3600
+    return api
+
+
+@pytest.fixture
+def client(api):
+    from app import create_app
+
+    client = create_app().test_client()
+    assert client.get('/api/seed_data').status_code == 200
+    return client
@@ -0,0 +1,53 @@
+import threading
+
+from flask import Flask
+
+from app.admission import AdmissionController, Slots
+
+
+def test_one_route_holds_at_most_its_share():
+    slots = Slots(total=3, per_route=2)
+    assert slots.acquire('search') and slots.acquire('search')
+    assert not slots.acquire('search')
+    assert slots.acquire('export')
+    # Every slot taken: refused at once, whatever the route
+    assert not slots.acquire('metrics')
+    slots.release('search')
+    assert slots.acquire('metrics')
+    assert slots.in_flight == 3 and slots.routes == {'search': 1, 'export': 1, 'metrics': 1}
+
+
+def test_share_rounds_up():
+    assert AdmissionController(slots=3, share=0.5).slots.per_route == 2
+    assert AdmissionController(slots=1, share=0.1).slots.per_route == 1
+
+
+def test_busy_route_is_shed_without_waiting():
+    app = Flask(__name__)
+    AdmissionController(rate=1000, burst=1000, slots=3, share=0.5).init_app(app)
+    entered = threading.Semaphore(0)
+    release = threading.Event()
+
+    @app.route('/api/slow')
+    def slow():
+        entered.release()
+        release.wait(5)
+        return 'done'
+
+    @app.route('/api/fast')
+    def fast():
+        return 'fast'
+
+    threads = [threading.Thread(target=app.test_client().get, args=('/api/slow',)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    entered.acquire()
+    entered.acquire()
+    client = app.test_client()
+    response = client.get('/api/slow')
+    assert response.status_code == 503 and response.headers['Retry-After'] == '1'
+    assert client.get('/api/fast').status_code == 200
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert client.get('/api/slow').status_code == 200
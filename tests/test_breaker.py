@@ -0,0 +1,216 @@
+import threading
+import time
+
+import pytest
+from mongomock.collection import Collection
+from pymongo.errors import AutoReconnect
+
+from app.breaker import CircuitBreaker, GuardedQueries, QueryUnavailable
+
+INJECTED = ('find', 'find_one', 'find_one_and_update', 'insert_many', 'bulk_write', 'delete_many')
+
+
+class FaultInjector:
+    """Delays or fails every mongomock collection call while set."""
+
+    def __init__(self, monkeypatch):
+        self.delay = 0.0
+        self.error = None
+        self.calls = 0
+        self.lock = threading.Lock()
+        for name in INJECTED:
+            monkeypatch.setattr(Collection, name, self.wrap(getattr(Collection, name)))
+
+    def wrap(self, method):
+        injector = self
+
+        def faulty(collection, *args, **kwargs):
+            with injector.lock:
+                injector.calls += 1
+            if injector.delay:
+                time.sleep(injector.delay)
+            if injector.error is not None:
+                raise injector.error
+            return method(collection, *args, **kwargs)
+
+        return faulty
+
+    def set(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+
+
+@pytest.fixture
+def faults(monkeypatch):
+    return FaultInjector(monkeypatch)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=3, reset_timeout=0.1)
+    breaker.failure()
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+    breaker.failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.failure()
+    assert breaker.state == 'open' and not breaker.allow()
+    assert 0 < breaker.retry_after() <= 0.1
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failures=1, reset_timeout=0.05)
+    breaker.failure()
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == 'half_open'
+    assert not breaker.allow()
+    breaker.success()
+    assert breaker.state == 'closed' and breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failures=1, reset_timeout=0.05)
+    breaker.failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == 'open' and not breaker.allow()
+    assert breaker.stats()['times_opened'] == 2
+
+
+def test_probe_that_never_reports_times_out():
+    breaker = CircuitBreaker(failures=1, reset_timeout=0.05)
+    breaker.failure()
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == 'half_open'
+    time.sleep(0.06)
+    assert not breaker.allow() and breaker.state == 'open'
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_released_probe_goes_to_next_caller():
+    breaker = CircuitBreaker(failures=1, reset_timeout=0.05)
+    breaker.failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == 'open'
+    assert breaker.allow() and breaker.state == 'half_open'
+
+
+def test_stale_result_served_after_a_database_error():
+    queries = GuardedQueries(breaker=CircuitBreaker(failures=5, reset_timeout=10), deadline=0.5, workers=2)
+    assert queries.query('k', lambda: [1, 2]) == ([1, 2], None)
+
+    def failover():
+        raise AutoReconnect('failover')
+
+    result, age = queries.query('k', failover)
+    assert result == [1, 2] and age is not None
+    assert queries.breaker.failures == 1
+    with pytest.raises(QueryUnavailable):
+        queries.query('other', failover)
+
+
+def test_hung_query_counts_at_the_deadline():
+    queries = GuardedQueries(breaker=CircuitBreaker(failures=2, reset_timeout=10), deadline=0.05, workers=4)
+    release = threading.Event()
+    start = time.monotonic()
+    for key in ('a', 'b'):
+        with pytest.raises(QueryUnavailable):
+            queries.query(key, release.wait)
+    # Open without waiting for the hung calls to return
+    assert queries.breaker.state == 'open'
+    assert time.monotonic() - start < 0.5
+    assert queries.submit('c', release.wait) is None
+    release.set()
+
+
+def test_full_pool_refuses_instead_of_queueing():
+    queries = GuardedQueries(breaker=CircuitBreaker(failures=5, reset_timeout=10), deadline=0.05, workers=1)
+    release = threading.Event()
+    assert queries.submit('a', release.wait) is not None
+    assert queries.submit('b', release.wait) is None
+    assert queries.stats()['rejected'] == 1
+    release.set()
+
+
+def test_query_accepted_before_the_circuit_opened_is_not_sent():
+    queries = GuardedQueries(breaker=CircuitBreaker(failures=1, reset_timeout=10), deadline=0.05, workers=1)
+    queries.breaker.failure()
+    calls = []
+    with pytest.raises(QueryUnavailable):
+        queries._run('k', lambda: calls.append(1))
+    assert calls == []
+
+
+def test_programming_error_is_raised_not_counted():
+    queries = GuardedQueries(breaker=CircuitBreaker(failures=1, reset_timeout=10), deadline=0.5, workers=2)
+    queries.query('k', lambda: 'ok')
+    with pytest.raises(KeyError):
+        queries.query('k', lambda: {}['missing'])
+    assert queries.breaker.state == 'closed' and queries.breaker.failures == 0
+
+
+def test_hung_database_opens_the_circuit_without_piling_up_calls(client, api, faults):
+    faults.set(delay=1.0)
+    start = time.monotonic()
+    statuses = [client.get('/api/diseases?q=term%d' % i).status_code for i in range(30)]
+    elapsed = time.monotonic() - start
+    assert statuses == [503] * 30
+    assert api._queries.breaker.state == 'open'
+    # Three requests wait out the deadline; the rest are answered at once
+    assert elapsed < 3 * 0.2 + 0.5, elapsed
+    calls = faults.calls
+    assert calls <= 3
+    time.sleep(1.1)
+    assert faults.calls == calls
+
+
+def test_failover_serves_stale_then_recovers(client, api, faults):
+    from app.snapshot import refresh_lock
+
+    response = client.get('/api/diseases?q=syndrome')
+    assert response.status_code == 200 and 'Warning' not in response.headers
+    client.get('/api/search?q=tokyo')
+
+    # Slow: answered from the last good result at the deadline
+    faults.set(delay=1.0)
+    start = time.monotonic()
+    response = client.get('/api/diseases?q=syndrome')
+    assert response.status_code == 200 and response.headers['Warning'].startswith('110')
+    assert time.monotonic() - start < 0.6
+    response = client.get('/api/diseases?q=never+seen+before')
+    assert response.status_code == 503 and 'Retry-After' in response.headers
+    time.sleep(1.2)
+
+    # Failing: the circuit opens, then no more calls reach Mongo
+    faults.set(error=AutoReconnect('injected failover'))
+    for _ in range(3):
+        response = client.get('/api/diseases?q=syndrome')
+        assert response.status_code == 200 and 'Warning' in response.headers
+    assert api._queries.breaker.state == 'open'
+    calls = faults.calls
+    response = client.get('/api/search?q=tokyo')
+    assert response.status_code == 200 and response.get_json()['total'] == 1 and 'Warning' in response.headers
+    response = client.get('/api/professional_centers?q=paris')
+    assert response.status_code == 503 and int(response.headers['Retry-After']) >= 1
+    assert faults.calls == calls
+    # The catalogue listing keeps serving its expired snapshot
+    api.CATALOGUE_TTL = 0
+    response = client.get('/api/diseases')
+    assert response.status_code == 200 and len(response.get_json()) == 75 and 'Warning' in response.headers
+
+    # Lost probe: the snapshot refresh takes it, finds the refresh lock held and hands it back
+    faults.set()
+    time.sleep(1.1)
+    with refresh_lock(api.CATALOGUE_SNAPSHOT):
+        assert client.get('/api/diseases').status_code == 200
+        time.sleep(0.2)
+        assert api._queries.breaker.state == 'open'
+
+    # Recovered: the next query is the probe and closes the circuit
+    response = client.get('/api/diseases?q=syndrome')
+    assert response.status_code == 200 and 'Warning' not in response.headers
+    assert api._queries.breaker.state == 'closed'
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from app.catalogue import Catalogue
+from app.snapshot import Snapshot, encode_record, write_snapshot
+
+DISEASES = [
+    {'id': 'd0', 'name': 'Marfan Syndrome', 'prevalance': 'Rare', 'symptoms': ['Joint pain', 'Tall stature']},
+    {'id': 'd1', 'name': 'Fabry Disease', 'prevalance': 'Rare', 'symptoms': ['Pain']},
+    {'id': 'd2', 'name': 'Progeria', 'prevalance': 'Extremely rare', 'symptoms': ['Joint pain']},
+]
+
+
+@pytest.fixture
+def catalogue(tmp_path):
+    path = str(tmp_path / 'catalogue.snapshot')
+    write_snapshot(path, DISEASES, [{'id': 'c0', 'name': 'Tokyo Center', 'location': 'Tokyo'}])
+    return Catalogue.from_snapshot(Snapshot(path))
+
+
+def names(catalogue, bits=None):
+    return [record['name'] for record in json.loads(catalogue.json_array('diseases', bits))]
+
+
+def apply(catalogue, record_id, doc):
+    catalogue.apply('diseases', record_id, doc, doc and encode_record(doc))
+
+
+def test_unpatched_catalogue_serves_the_snapshot(catalogue):
+    assert catalogue.json_array('diseases') == catalogue.snapshot.json_array('diseases')
+    assert names(catalogue, catalogue.select_diseases({'symptoms': ['Joint pain']})) == ['Marfan Syndrome', 'Progeria']
+    assert names(catalogue, catalogue.select_diseases({}, name='fab')) == ['Fabry Disease']
+    assert catalogue.facet_counts(catalogue.live['diseases'])['prevalance'] == {'Rare': 2, 'Extremely rare': 1}
+
+
+def test_replace_moves_the_record_between_facets(catalogue):
+    apply(catalogue, 'd1', dict(DISEASES[1], prevalance='Very rare', symptoms=['Joint pain']))
+    assert names(catalogue) == ['Marfan Syndrome', 'Fabry Disease', 'Progeria']
+    assert json.loads(catalogue.json_array('diseases'))[1]['prevalance'] == 'Very rare'
+    assert names(catalogue, catalogue.select_diseases({'prevalance': ['Rare']})) == ['Marfan Syndrome']
+    assert names(catalogue, catalogue.select_diseases({'prevalance': ['Very rare']})) == ['Fabry Disease']
+    counts = catalogue.facet_counts(catalogue.live['diseases'])
+    assert counts['symptoms'] == {'Joint pain': 3, 'Tall stature': 1}
+
+
+def test_insert_and_delete(catalogue):
+    apply(catalogue, 'd3', {'id': 'd3', 'name': 'Alport Syndrome', 'prevalance': 'Rare', 'symptoms': ['Pain']})
+    apply(catalogue, 'd0', None)
+    assert names(catalogue) == ['Fabry Disease', 'Progeria', 'Alport Syndrome']
+    assert names(catalogue, catalogue.select_diseases({'prevalance': ['Rare']})) == ['Fabry Disease', 'Alport Syndrome']
+    assert catalogue.select_diseases({'symptoms': ['Tall stature']}) == 0
+    assert not catalogue.is_live('diseases', 'd0') and catalogue.is_live('diseases', 'd3')
+    # Deleting twice, or something never seen, changes nothing
+    apply(catalogue, 'd0', None)
+    apply(catalogue, 'missing', None)
+    assert catalogue.live['diseases'].bit_count() == 3
+
+
+def test_deleted_record_comes_back_with_its_new_content(catalogue):
+    apply(catalogue, 'd2', None)
+    apply(catalogue, 'd2', dict(DISEASES[2], symptoms=['Hair loss']))
+    assert names(catalogue, catalogue.select_diseases({'symptoms': ['Hair loss']})) == ['Progeria']
+    assert names(catalogue, catalogue.select_diseases({'symptoms': ['Joint pain']})) == ['Marfan Syndrome']
+
+
+def test_apply_never_mutates_what_a_reader_holds(catalogue):
+    facets, overrides = catalogue.facets, catalogue.overrides['diseases']
+    before = {field: dict(index) for field, index in facets.items()}
+    apply(catalogue, 'd1', dict(DISEASES[1], prevalance='Very rare'))
+    assert catalogue.facets is not facets and catalogue.overrides['diseases'] is not overrides
+    assert facets == before and overrides == {}
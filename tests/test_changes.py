@@ -0,0 +1,53 @@
+import datetime
+
+from app import models
+from app.models import DiseaseCard, Tombstone, reserve_revisions, safe_revision, tombstone_horizon
+
+
+def test_leases_expire_through_a_ttl_index(db):
+    with reserve_revisions(3):
+        pass
+    index = db['revision_leases'].index_information()['at_1']
+    assert index['expireAfterSeconds'] == int(models.REVISION_LEASE_SECONDS)
+
+
+def test_expired_leases_do_not_hold_back_safe_revision(db):
+    with reserve_revisions(5) as last:
+        assert safe_revision() == 0
+    expired = datetime.datetime.utcnow() - datetime.timedelta(seconds=models.REVISION_LEASE_SECONDS + 1)
+    db['revision_leases'].insert_one({'floor': 1, 'at': expired})
+    assert safe_revision() == last
+
+
+def test_old_tombstones_are_pruned_and_raise_the_horizon(db):
+    Tombstone.record(DiseaseCard, ['a', 'b'])
+    old = datetime.datetime.utcnow() - datetime.timedelta(days=models.TOMBSTONE_RETENTION_DAYS + 1)
+    db['tombstone'].update_many({}, {'$set': {'deleted_at': old}})
+    assert tombstone_horizon() == 0
+    Tombstone.record(DiseaseCard, ['c'])
+    assert [t['record_id'] for t in db['tombstone'].find()] == ['c']
+    assert tombstone_horizon() == 2
+
+
+def delete(client, card):
+    headers = {'Authorization': 'Bearer test-token', 'If-Match': '"%d"' % card['revision']}
+    assert client.delete('/api/diseases/' + card['id'], headers=headers).status_code == 204
+
+
+def test_changes_since_before_the_horizon_is_gone(client, db):
+    first = client.get('/api/changes').get_json()['revision']
+    card = client.get('/api/diseases').get_json()[0]
+    delete(client, card)
+    changes = client.get('/api/changes?since=%d' % first).get_json()
+    assert changes['diseases']['deleted'] == [card['id']]
+
+    old = datetime.datetime.utcnow() - datetime.timedelta(days=models.TOMBSTONE_RETENTION_DAYS + 1)
+    db['tombstone'].update_many({}, {'$set': {'deleted_at': old}})
+    other = client.get('/api/diseases').get_json()[0]
+    delete(client, other)
+
+    response = client.get('/api/changes?since=%d' % first)
+    assert response.status_code == 410 and response.get_json()['horizon'] == tombstone_horizon() > first
+    assert client.get('/api/changes?since=0').status_code == 200
+    changes = client.get('/api/changes?since=%d' % tombstone_horizon()).get_json()
+    assert changes['diseases']['deleted'] == [other['id']]
@@ -0,0 +1,45 @@
+from app.folding import MAX_PREFIX, fold, matches, name_key, name_score, query_tokens, search_prefixes
+
+
+def test_fold_ignores_accents_case_and_punctuation():
+    assert fold('Sjögren’s Syndrome') == 'sjogrens syndrome'
+    assert fold("sjogren's syndrome") == 'sjogrens syndrome'
+    assert fold('SJOGRENS  SYNDROME') == 'sjogrens syndrome'
+    assert fold('Hutchinson-Gilford (HGPS)') == 'hutchinson gilford hgps'
+    assert fold(None) == ''
+
+
+def test_query_tokens_are_distinct_and_capped():
+    assert query_tokens('Syndrome, syndrome  DOWN') == ['syndrome', 'down']
+    assert query_tokens('x' * 40) == ['x' * MAX_PREFIX]
+    assert query_tokens(' - ') == []
+
+
+def test_search_prefixes_cover_every_word_of_every_field():
+    prefixes = search_prefixes('Tokyo Center', ['Café au lait'], None)
+    assert prefixes == sorted(prefixes)
+    for token in ('t', 'tok', 'tokyo', 'c', 'center', 'cafe', 'au', 'lait'):
+        assert token in prefixes
+    assert 'okyo' not in prefixes and 'tokyo center' not in prefixes
+    assert max(map(len, search_prefixes('y' * 40))) == MAX_PREFIX
+
+
+def test_prefixes_contain_all_tokens_exactly_when_matches():
+    name, location = 'Sjögren’s Syndrome Clinic', 'Paris, France'
+    prefixes = set(search_prefixes(name, location))
+    for query in ('sjogren', 'SYND clin', 'paris sjo', 'clinic lyon', 'gren', 'x' * 30):
+        tokens = query_tokens(query)
+        assert matches(tokens, name, location) == (set(tokens) <= prefixes), query
+
+
+def test_name_score_ranks_exact_then_prefix_then_words():
+    tokens = query_tokens('marfan syndrome')
+    assert name_score(tokens, 'Marfan Syndrome') == 3
+    assert name_score(tokens, 'Marfan Syndrome Type 2') == 2
+    assert name_score(tokens, 'Neonatal Marfan-like Syndrome') == 1
+    assert name_score(tokens, 'Marfan') == 0
+
+
+def test_name_key_is_case_insensitive_only():
+    assert name_key('Marfan Syndrome') == name_key('MARFAN syndrome')
+    assert name_key('Sjögren') != name_key('Sjogren')
@@ -0,0 +1,65 @@
+import datetime
+
+from app.catalogue import Catalogue
+from app.hours import WEEK, OpeningIndex, parse_hours
+from app.snapshot import Snapshot, write_snapshot
+
+UTC = datetime.timezone.utc
+MONDAY_NOON = datetime.datetime(2026, 10, 19, 12, 0, tzinfo=UTC)
+SUNDAY_NIGHT = datetime.datetime(2026, 10, 18, 23, 30, tzinfo=UTC)
+
+
+def test_parse_hours_forms():
+    assert parse_hours('24/7') == [[0, WEEK]]
+    assert parse_hours('9am - 5pm Mon-Fri') == [[d * 1440 + 540, d * 1440 + 1020] for d in range(5)]
+    assert parse_hours('Mon-Fri 9am-5pm') == parse_hours('9am - 5pm Mon-Fri')
+    assert parse_hours('9:30am - 5pm Mon, Wed, Fri') == [[570, 1020], [2 * 1440 + 570, 2 * 1440 + 1020],
+                                                         [4 * 1440 + 570, 4 * 1440 + 1020]]
+    assert parse_hours('9am-1pm Mon; 12pm-5pm Mon') == [[540, 1020]]
+
+
+def test_parse_hours_wraps_sunday_night_into_monday():
+    assert parse_hours('10pm - 6am Sun') == [[0, 360], [6 * 1440 + 1320, WEEK]]
+
+
+def test_parse_hours_rejects_what_it_does_not_understand():
+    assert parse_hours('') is None
+    assert parse_hours('by appointment') is None
+    assert parse_hours('9am - 5pm') is None
+
+
+def test_opening_index_uses_each_centers_timezone():
+    weekdays = parse_hours('9am - 5pm Mon-Fri')
+    index = OpeningIndex([('Europe/London', weekdays), ('Asia/Tokyo', weekdays), ('America/New_York', weekdays)])
+    # 12:00 UTC: 13:00 in London, 21:00 in Tokyo, 08:00 in New York
+    assert index.open_at(MONDAY_NOON) == 0b001
+    # Naive instants are UTC
+    assert index.open_at(MONDAY_NOON.replace(tzinfo=None)) == 0b001
+    # 23:30 UTC Sunday is 08:30 Monday in Tokyo, still closed; 09:30 is open
+    assert index.open_at(SUNDAY_NIGHT) == 0
+    assert index.open_at(SUNDAY_NIGHT + datetime.timedelta(hours=1)) == 0b010
+
+
+def test_round_the_clock_center_needs_no_timezone():
+    index = OpeningIndex([(None, [[0, WEEK]]), (None, parse_hours('9am - 5pm Mon-Fri')), ('Europe/Paris', None)])
+    assert index.open_at(MONDAY_NOON) == 0b001
+    assert index.open_at(SUNDAY_NIGHT) == 0b001
+
+
+def test_catalogue_reads_stored_intervals_not_the_hours_text(tmp_path):
+    path = str(tmp_path / 'catalogue.snapshot')
+    centers = [
+        {'id': 'a', 'name': 'A', 'hours_of_operation': '9am - 5pm Mon-Fri', 'timezone': 'Europe/London'},
+        {'id': 'b', 'name': 'B', 'hours_of_operation': 'Closed', 'timezone': 'Europe/London'},
+    ]
+    # What the write path stored wins over the display text
+    write_snapshot(path, [], centers, meta={'opening_intervals': {'a': [[0, WEEK]], 'b': None}})
+    catalogue = Catalogue.from_snapshot(Snapshot(path))
+    assert catalogue.open_centers(SUNDAY_NIGHT) == 0b01
+    assert b'opening_intervals' not in catalogue.json_array('centers')
+
+    doc = dict(centers[1], opening_intervals=parse_hours('9am - 5pm Mon-Fri'))
+    catalogue.apply('centers', 'b', doc, b'{"id":"b"}')
+    assert catalogue.open_centers(MONDAY_NOON) == 0b11
+    catalogue.apply('centers', 'a', None, None)
+    assert catalogue.open_centers(MONDAY_NOON) == 0b10
@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.importer import import_records
+from app.models import DiseaseCard, Tombstone
+
+
+def card(name, **fields):
+    return dict({'name': name, 'symptoms': ['Fatigue'], 'prevalance': 'Rare'}, **fields)
+
+
+def stored(db):
+    return {doc['name']: doc for doc in db['disease_card'].find()}
+
+
+def test_sync_writes_only_what_differs(db):
+    report = import_records(DiseaseCard, 'diseases', [card('Marfan Syndrome'), card('Fabry Disease')], sync=True)
+    assert (report.inserted, report.updated, report.deleted, report.unchanged) == (2, 0, 0, 0)
+    before = stored(db)
+
+    report = import_records(DiseaseCard, 'diseases', [
+        card('Marfan Syndrome'), card('Fabry Disease', symptoms=['Pain']), card('Progeria'),
+    ], sync=True)
+    assert (report.inserted, report.updated, report.deleted, report.unchanged) == (1, 1, 0, 1)
+    after = stored(db)
+    assert after['Marfan Syndrome'] == before['Marfan Syndrome']
+    fabry = after['Fabry Disease']
+    assert fabry['_id'] == before['Fabry Disease']['_id'] and fabry['symptoms'] == ['Pain']
+    assert fabry['created_revision'] == before['Fabry Disease']['created_revision'] < fabry['revision']
+
+    report = import_records(DiseaseCard, 'diseases', [card('Progeria')], sync=True)
+    assert (report.inserted, report.updated, report.deleted, report.unchanged) == (0, 0, 2, 1)
+    assert list(stored(db)) == ['Progeria']
+    assert sorted(t['record_id'] for t in db['tombstone'].find()) == sorted(
+        str(doc['_id']) for doc in before.values()
+    )
+
+
+def test_sync_matches_names_case_insensitively(db):
+    import_records(DiseaseCard, 'diseases', [card('Marfan syndrome')], sync=True)
+    original = stored(db)['Marfan syndrome']
+    report = import_records(DiseaseCard, 'diseases', [card('Marfan Syndrome')], sync=True)
+    assert (report.inserted, report.updated, report.deleted) == (0, 1, 0)
+    (renamed,) = stored(db).values()
+    assert renamed['_id'] == original['_id'] and renamed['name'] == 'Marfan Syndrome'
+
+
+def test_duplicates_stored_before_the_unique_index_are_removed(db):
+    # As left by older versions: no name key, no index, the same name in several cases
+    now = datetime.datetime.utcnow()
+    ids = db['disease_card'].insert_many([
+        {'name': 'Marfan Syndrome', 'revision': 1, 'updated_at': now},
+        {'name': 'MARFAN SYNDROME', 'revision': 2, 'updated_at': now},
+        {'name': 'Fabry Disease', 'revision': 3, 'updated_at': now},
+        {'name': 'marfan syndrome', 'revision': 4, 'updated_at': now},
+    ]).inserted_ids
+
+    assert DiseaseCard.prepare_collection() == 2
+    assert DiseaseCard.prepare_collection() == 0
+    assert sorted(stored(db)) == ['Fabry Disease', 'Marfan Syndrome']
+    assert {t['record_id'] for t in Tombstone._get_collection().find()} == {str(ids[1]), str(ids[3])}
+    with pytest.raises(DuplicateKeyError):
+        db['disease_card'].insert_one({'name': 'Fabry disease', 'name_key': 'fabry disease'})
+
+    report = import_records(DiseaseCard, 'diseases', [card('Marfan Syndrome'), card('Fabry Disease')], sync=True)
+    assert (report.inserted, report.updated, report.deleted) == (0, 2, 0)
+    assert {doc['_id'] for doc in db['disease_card'].find()} == {ids[0], ids[2]}
+
+
+def test_import_rejects_later_copies_of_a_name(db):
+    report = import_records(DiseaseCard, 'diseases', [card('Progeria'), card('PROGERIA'), card('Alport')], sync=True)
+    assert report.inserted == 2
+    assert [(r['index'], r['errors']) for r in report.rejected] == [(1, ['name: duplicate of an earlier record'])]
@@ -0,0 +1,24 @@
+from app.related import top_neighbors
+
+
+def card(i, symptoms, causes=()):
+    return {'_id': i, 'name': 'Card %d' % i, 'symptoms': symptoms, 'causes': list(causes)}
+
+
+def test_small_catalogue_keeps_common_features():
+    # Every feature is on more than a fifth of these cards
+    docs = [
+        card(0, ['Fatigue', 'Seizures']),
+        card(1, ['fatigue ', 'Seizures']),
+        card(2, ['Fatigue'], ['Genetic mutation']),
+        card(3, ['Tremors'], ['Genetic mutation']),
+    ]
+    neighbors = top_neighbors(docs, k=2)
+    assert [other for _, other, _ in neighbors[0]] == [1, 2]
+    assert [other for _, other, _ in neighbors[3]] == [2]
+
+
+def test_cutoff_applies_to_large_catalogues():
+    docs = [card(i, ['Fatigue']) for i in range(10)]
+    assert all(neighbors for neighbors in top_neighbors(docs, min_cards=20).values())
+    assert not any(top_neighbors(docs, min_cards=10).values())
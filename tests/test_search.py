@@ -0,0 +1,29 @@
+def test_search_fetches_at_most_limit_per_side(client, api, monkeypatch):
+    limits = []
+    search_diseases, search_centers = api.search_diseases, api.search_centers
+
+    def diseases(tokens, filters=None, limit=None):
+        limits.append(limit)
+        return search_diseases(tokens, filters, limit)
+
+    def centers(tokens, limit=None):
+        limits.append(limit)
+        return search_centers(tokens, limit)
+
+    monkeypatch.setattr(api, 'search_diseases', diseases)
+    monkeypatch.setattr(api, 'search_centers', centers)
+    body = client.get('/api/search?q=syndrome&limit=2').get_json()
+    assert sorted(limits) == [2, 2]
+    assert body['total'] <= 4 and len(body['results']) == 2
+    assert body['results'][0]['score'] >= body['results'][1]['score']
+
+    # A larger limit is its own query, not the cached smaller answer
+    body = client.get('/api/search?q=syndrome&limit=50').get_json()
+    assert limits[2:] and set(limits[2:]) == {50}
+    assert body['total'] > 4
+
+
+def test_search_rejects_bad_limits(client):
+    assert client.get('/api/search?q=syndrome&limit=0').status_code == 400
+    assert client.get('/api/search?q=syndrome&limit=ten').status_code == 400
+    assert client.get('/api/search').status_code == 400
@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+from app.snapshot import Snapshot, refresh_lock, snapshot_stat, write_snapshot
+
+DISEASES = [
+    {'id': 'd1', 'name': 'Sjögren’s Syndrome', 'symptoms': ['Dry eyes']},
+    {'id': 'd2', 'name': 'Marfan Syndrome', 'prevalance': 'Rare'},
+    {'id': 'd3', 'name': 'Fabry Disease'},
+]
+CENTERS = [{'id': 'c1', 'name': 'Tokyo Center', 'contact_info': {'phone': '+81 3'}}]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'catalogue.snapshot')
+
+
+def test_round_trip(path):
+    write_snapshot(path, iter(DISEASES), iter(CENTERS), meta={'operation_time': [5, 1]})
+    snapshot = Snapshot(path)
+    assert len(snapshot) == 4 and snapshot.count('diseases') == 3 and snapshot.count('centers') == 1
+    assert list(snapshot.records('diseases')) == DISEASES
+    assert list(snapshot.records('centers')) == CENTERS
+    assert snapshot.meta == {'operation_time': [5, 1]}
+    assert json.loads(snapshot.record('diseases', 1)) == DISEASES[1]
+
+
+def test_json_arrays_are_slices_of_the_file(path):
+    write_snapshot(path, DISEASES, CENTERS)
+    snapshot = Snapshot(path)
+    assert json.loads(snapshot.json_array('diseases')) == DISEASES
+    assert json.loads(snapshot.json_array('diseases', [2, 0])) == [DISEASES[2], DISEASES[0]]
+    assert json.loads(snapshot.json_array('centers')) == CENTERS
+
+
+def test_empty_kinds(path):
+    write_snapshot(path, [], [])
+    snapshot = Snapshot(path)
+    assert snapshot.json_array('diseases') == b'[]' and snapshot.json_array('centers') == b'[]'
+    assert list(snapshot.records('centers')) == [] and snapshot.meta == {}
+
+
+def test_rewrite_replaces_the_file_under_open_readers(path):
+    write_snapshot(path, DISEASES, CENTERS)
+    old = Snapshot(path)
+    write_snapshot(path, DISEASES[:1], [])
+    new = Snapshot(path)
+    assert new.key != old.key and new.count('diseases') == 1
+    # The old mapping still reads the file it was opened on
+    assert json.loads(old.json_array('diseases')) == DISEASES
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith('.tmp')]
+
+
+def test_rejects_other_files(path):
+    with open(path, 'wb') as f:
+        f.write(b'not a snapshot' + b'\0' * 64)
+    with pytest.raises(ValueError):
+        Snapshot(path)
+    assert snapshot_stat(path + '.missing') is None
+
+
+def test_refresh_lock_is_exclusive(path):
+    with refresh_lock(path) as locked:
+        assert locked
+        with refresh_lock(path, blocking=False) as again:
+            assert not again
+    with refresh_lock(path, blocking=False) as locked:
+        assert locked
@@ -0,0 +1,97 @@
+from bson import ObjectId
+from mongomock.collection import Collection
+
+from app.importer import import_records, normalize_record
+from app.models import DiseaseCard
+from app.writes import WriteOp, commit
+
+
+def seed(db, *names):
+    import_records(DiseaseCard, 'diseases', [{'name': name, 'symptoms': ['Fatigue']} for name in names], sync=True)
+    return {doc['name']: doc for doc in db['disease_card'].find()}
+
+
+def insert(name):
+    record, errors = normalize_record('diseases', {'name': name, 'symptoms': ['Pain']})
+    assert not errors
+    return WriteOp(DiseaseCard, 'diseases', 'insert', fields=record)
+
+
+def patch(doc, expected=None, **fields):
+    revision = doc['revision'] if expected is None else expected
+    return WriteOp(DiseaseCard, 'diseases', 'patch', str(doc['_id']), revision, fields)
+
+
+def delete(doc):
+    return WriteOp(DiseaseCard, 'diseases', 'delete', str(doc['_id']), doc['revision'])
+
+
+def run(ops):
+    committed = {}
+    commit(DiseaseCard, 'diseases', ops, lambda kind, docs: committed.update(docs))
+    return [op.status for op in ops], committed
+
+
+def test_batch_answers_each_op_in_order(db):
+    docs = seed(db, 'Marfan Syndrome', 'Fabry Disease')
+    marfan, fabry = docs['Marfan Syndrome'], docs['Fabry Disease']
+    ops = [
+        insert('Progeria'),
+        patch(marfan, symptoms=['Joint pain']),
+        patch(marfan, symptoms=['Stale']),  # based on the revision the previous op replaced
+        delete(fabry),
+        WriteOp(DiseaseCard, 'diseases', 'delete', str(ObjectId()), 1),
+    ]
+    statuses, committed = run(ops)
+    assert statuses == [201, 200, 409, 204, 404]
+    assert ops[2].body['revision'] == ops[1].body['revision']
+    stored = {doc['name']: doc for doc in db['disease_card'].find()}
+    assert sorted(stored) == ['Marfan Syndrome', 'Progeria']
+    assert stored['Marfan Syndrome']['symptoms'] == ['Joint pain']
+    assert committed[str(fabry['_id'])] is None and len(committed) == 3
+
+
+def test_names_clash_case_insensitively(db):
+    docs = seed(db, 'Marfan Syndrome', 'Fabry Disease')
+    statuses, _ = run([
+        insert('marfan SYNDROME'),
+        insert('Progeria'),
+        insert(' PROGERIA '),
+        patch(docs['Fabry Disease'], name='MARFAN syndrome'),
+        patch(docs['Marfan Syndrome'], name='MARFAN SYNDROME'),  # its own name in another case
+    ])
+    assert statuses == [409, 201, 409, 409, 200]
+    assert sorted(doc['name'] for doc in db['disease_card'].find()) == ['Fabry Disease', 'MARFAN SYNDROME', 'Progeria']
+
+
+def test_write_lost_to_another_worker_is_a_conflict(db, monkeypatch):
+    docs = seed(db, 'Marfan Syndrome', 'Fabry Disease')
+    marfan, fabry = docs['Marfan Syndrome'], docs['Fabry Disease']
+    bulk_write = Collection.bulk_write
+
+    def racing_bulk_write(collection, operations, **kwargs):
+        # Another worker patches Marfan between our read and our write
+        collection.update_one({'_id': marfan['_id']}, {'$inc': {'revision': 1000}})
+        return bulk_write(collection, operations, **kwargs)
+
+    monkeypatch.setattr(Collection, 'bulk_write', racing_bulk_write)
+    statuses, committed = run([patch(marfan, symptoms=['Mine']), patch(fabry, symptoms=['Pain'])])
+    assert statuses == [409, 200]
+    assert list(committed) == [str(fabry['_id'])]
+    assert db['disease_card'].find_one({'_id': marfan['_id']})['symptoms'] == ['Fatigue']
+
+
+def test_name_taken_by_another_worker_fails_only_that_record(db, monkeypatch):
+    docs = seed(db, 'Fabry Disease')
+    bulk_write = Collection.bulk_write
+
+    def racing_bulk_write(collection, operations, **kwargs):
+        collection.insert_one({'name': 'PROGERIA', 'name_key': 'progeria'})
+        return bulk_write(collection, operations, **kwargs)
+
+    monkeypatch.setattr(Collection, 'bulk_write', racing_bulk_write)
+    ops = [insert('Progeria'), patch(docs['Fabry Disease'], symptoms=['Pain'])]
+    statuses, committed = run(ops)
+    assert statuses == [409, 200]
+    assert ops[0].body == {'error': 'A record with this name already exists'}
+    assert list(committed) == [str(docs['Fabry Disease']['_id'])]